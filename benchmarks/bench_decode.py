@@ -0,0 +1,82 @@
+"""Compare per-item decode + validate cost of the previous and current client paths.
+
+    python benchmarks/bench_decode.py --items 50000
+"""
+import argparse
+import json
+import random
+from time import perf_counter
+
+from cdk_mf_consumer.client import json_loads
+from cdk_mf_consumer.models import HNItemAdapter
+from cdk_mf_consumer.models.base_models import HNCommentItem, HNItem, HNStoryItem
+
+MODELS: dict[str, type[HNItem]] = {"story": HNStoryItem, "comment": HNCommentItem}
+
+
+def corpus(size: int, seed: int = 0) -> list[bytes]:
+    rng = random.Random(seed)
+    payloads = []
+    for item_id in range(1, size + 1):
+        base = {"id": item_id, "by": f"user{rng.randrange(5000)}", "time": 1_700_000_000 + item_id}
+        if rng.random() < 0.15:
+            item = {
+                **base,
+                "type": "story",
+                "title": "Show HN: A thing I built",
+                "url": "https://example.com/post",
+                "score": rng.randrange(500),
+                "descendants": rng.randrange(200),
+                "kids": [item_id * 10 + k for k in range(rng.randrange(20))],
+            }
+        else:
+            item = {
+                **base,
+                "type": "comment",
+                "parent": max(1, item_id - rng.randrange(1, 100)),
+                "text": "I&#x27;d argue the opposite.<p>" + "word " * rng.randrange(5, 120),
+                "kids": [item_id * 10 + k for k in range(rng.randrange(4))],
+            }
+        payloads.append(json.dumps(item).encode())
+    return payloads
+
+
+def stdlib_dispatch(raw: bytes) -> HNItem:
+    data = json.loads(raw)
+    return MODELS[data["type"]](**data)
+
+
+def fast_dispatch(raw: bytes) -> HNItem:
+    return MODELS[(data := json_loads(raw))["type"]](**data)
+
+
+def timed(fn, payloads: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        for raw in payloads:
+            fn(raw)
+        best = min(best, perf_counter() - start)
+    return best / len(payloads) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payloads = corpus(args.items)
+    baseline = timed(stdlib_dispatch, payloads, args.repeat)
+    print(f"decoder: {json_loads.__module__}")
+    print(f"json.loads + Model(**data):      {baseline:.2f} us/item")
+    for name, fn in [
+        ("fast loads + Model(**data):      ", fast_dispatch),
+        ("HNItemAdapter.validate_json(raw):", HNItemAdapter.validate_json),
+    ]:
+        cost = timed(fn, payloads, args.repeat)
+        print(f"{name} {cost:.2f} us/item ({baseline / cost:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare plain Parquet write cost against enrich + write on synthetic comments.
+
+    python benchmarks/bench_enrich.py --rows 1000000
+"""
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+
+import polars as pl
+
+from cdk_mf_consumer.data import HNData
+
+WORDS = ["the", "rust", "python", "latency", "&amp;", "it&#x27;s", "<i>really</i>", "fast", "&quot;why&quot;"]
+
+
+def synthetic_comments(rows: int, seed: int = 0) -> pl.DataFrame:
+    schema = HNData().comment_schema
+    ids = pl.int_range(1, rows + 1, eager=True)
+    return pl.DataFrame(
+        {
+            "id": ids,
+            "type": pl.repeat("comment", rows, eager=True),
+            "by": ("user" + (ids % 5000).cast(pl.Utf8)),
+            "time": pl.repeat(datetime(2024, 1, 15), rows, eager=True),
+            "dead": pl.repeat(False, rows, eager=True),
+            "deleted": pl.repeat(False, rows, eager=True),
+            "kids": pl.Series([[1, 2, 3], [], [4]] * (rows // 3) + [[]] * (rows % 3)),
+            "text": pl.Series(
+                [" ".join(WORDS[(i + j) % len(WORDS)] for j in range(12)) + "<p>More." for i in range(rows)]
+            ),
+            "parent": ids // 7 + 1,
+        },
+        schema=schema,
+    ).sample(fraction=1.0, shuffle=True, seed=seed)
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = perf_counter()
+        fn()
+        timings.append(perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    hn_data = HNData()
+    df = synthetic_comments(args.rows)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "comments.parquet"
+
+        def plain() -> None:
+            hn_data.write_parquet(df, path, overwrite=True)
+
+        def enriched() -> None:
+            frames = hn_data.enrich_frames({"comment": df})
+            hn_data.write_parquet(frames["comment"], path, overwrite=True)
+
+        plain_s = best_of(plain, args.repeat)
+        enriched_s = best_of(enriched, args.repeat)
+
+    print(f"rows={args.rows:,}")
+    print(f"plain write:     {plain_s:.3f}s")
+    print(f"enrich + write:  {enriched_s:.3f}s ({enriched_s / plain_s:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
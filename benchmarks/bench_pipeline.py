@@ -0,0 +1,56 @@
+"""Measure DecodePool throughput on raw item payloads as workers are added.
+
+    python benchmarks/bench_pipeline.py --items 200000 --batch-size 500
+"""
+import argparse
+import os
+import tempfile
+from time import perf_counter
+
+from bench_decode import corpus
+
+from cdk_mf_consumer.pipeline import DecodePool, decode_items
+
+
+def run_in_process(payloads: list[bytes], batch_size: int) -> float:
+    start = perf_counter()
+    with tempfile.TemporaryDirectory() as spill_dir:
+        for i in range(0, len(payloads), batch_size):
+            decode_items(payloads[i:i + batch_size], spill_dir)
+    return perf_counter() - start
+
+
+def run(payloads: list[bytes], workers: int, batch_size: int) -> float:
+    stats: dict[str, int] = {}
+    start = perf_counter()
+    with DecodePool(workers, threads=False) as pool:
+        for i in range(0, len(payloads), batch_size):
+            pool.submit(payloads[i:i + batch_size])
+        pool.collect(stats)
+    return perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    payloads = corpus(args.items)
+    elapsed = run_in_process(payloads, args.batch_size)
+    print(f"in-process  {elapsed:.2f}s  {args.items / elapsed:,.0f} items/s")
+    baseline = None
+    workers = 1
+    while workers <= args.max_workers:
+        elapsed = run(payloads, workers, args.batch_size)
+        baseline = baseline or elapsed
+        print(
+            f"workers={workers:<3} {elapsed:.2f}s  {args.items / elapsed:,.0f} items/s  "
+            f"speedup {baseline / elapsed:.2f}x"
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
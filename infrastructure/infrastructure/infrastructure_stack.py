@@ -1,21 +1,97 @@
+from pathlib import Path
+
 from aws_cdk import (
-    # Duration,
+    ArnFormat,
+    Duration,
     Stack,
+    aws_events as events,
+    aws_events_targets as targets,
+    aws_iam as iam,
+    aws_lambda as lambda_,
+    aws_lambda_event_sources as event_sources,
+    aws_sqs as sqs,
+    aws_ssm as ssm,
 )
-
-# aws_sqs as sqs,
 from constructs import Construct
 
+TRIGGER_CODE = Path(__file__).parent / "trigger"
+
 
 class InfrastructureStack(Stack):
+    """Starts HNIngestFlow when enough items have changed, instead of on a fixed schedule.
+
+    A scheduled poller compares the HN API with a watermark and queues batches
+    of changed item ids; a launcher starts one run of the flow's Step Functions
+    state machine (deployed with `step-functions create`) per batch.
+
+    Context values: `change_threshold` (default 500), `batch_size` (2000),
+    `poll_minutes` (5) and `ingest_state_machine_arn` (defaults to the
+    HNIngestFlow state machine in the stack's account and region).
+    """
 
     def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
-        # The code that defines your stack goes here
+        threshold = int(self.node.try_get_context("change_threshold") or 500)
+        batch_size = int(self.node.try_get_context("batch_size") or 2000)
+        poll_minutes = int(self.node.try_get_context("poll_minutes") or 5)
+        state_machine_arn = self.node.try_get_context("ingest_state_machine_arn") or self.format_arn(
+            service="states",
+            resource="stateMachine",
+            resource_name="HNIngestFlow",
+            arn_format=ArnFormat.COLON_RESOURCE_NAME,
+        )
+
+        dead_letters = sqs.Queue(self, "IngestBatchDeadLetters", retention_period=Duration.days(14))
+        batches = sqs.Queue(
+            self,
+            "IngestBatches",
+            visibility_timeout=Duration.seconds(60),
+            dead_letter_queue=sqs.DeadLetterQueue(max_receive_count=3, queue=dead_letters),
+        )
+        watermark = ssm.StringParameter(
+            self,
+            "IngestWatermark",
+            description="Max item id and updates.json ids at the last HNIngestFlow trigger",
+            string_value="{}",
+        )
+
+        code = lambda_.Code.from_asset(str(TRIGGER_CODE), exclude=["local.py", "__pycache__"])
+        poller = lambda_.Function(
+            self,
+            "IngestPoller",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.poll_handler",
+            code=code,
+            timeout=Duration.seconds(30),
+            memory_size=256,
+            environment={
+                "WATERMARK_PARAMETER": watermark.parameter_name,
+                "QUEUE_URL": batches.queue_url,
+                "CHANGE_THRESHOLD": str(threshold),
+                "BATCH_SIZE": str(batch_size),
+            },
+        )
+        watermark.grant_read(poller)
+        watermark.grant_write(poller)
+        batches.grant_send_messages(poller)
+        events.Rule(
+            self,
+            "IngestPollSchedule",
+            schedule=events.Schedule.rate(Duration.minutes(poll_minutes)),
+            targets=[targets.LambdaFunction(poller)],
+        )
 
-        # example resource
-        # queue = sqs.Queue(
-        #     self, "InfrastructureQueue",
-        #     visibility_timeout=Duration.seconds(300),
-        # )
+        launcher = lambda_.Function(
+            self,
+            "IngestLauncher",
+            runtime=lambda_.Runtime.PYTHON_3_12,
+            handler="handler.launch_handler",
+            code=code,
+            timeout=Duration.seconds(30),
+            environment={"STATE_MACHINE_ARN": state_machine_arn},
+        )
+        launcher.add_event_source(event_sources.SqsEventSource(batches, batch_size=1))
+        launcher.add_to_role_policy(
+            iam.PolicyStatement(actions=["states:StartExecution"], resources=[state_machine_arn])
+        )
@@ -0,0 +1,167 @@
+"""Event trigger for HNIngestFlow: start the flow once enough of Hacker News has changed.
+
+`poll_handler` runs on a schedule. It compares maxitem.json and updates.json
+with the watermark kept in an SSM parameter and, once the number of changed
+items reaches the threshold, sends their ids to SQS in batches.
+`launch_handler` consumes that queue and starts one Step Functions execution
+of the deployed flow per batch, passing the ids as the `batch_ids` parameter.
+
+Only the standard library and boto3 (bundled with the Lambda runtime) are
+used, so the asset deploys without a build step.
+"""
+
+import json
+import os
+import urllib.request
+from dataclasses import asdict, dataclass, field
+from typing import Any, Protocol
+
+HN_API_URL = "https://hacker-news.firebaseio.com/v0"
+
+
+@dataclass
+class Watermark:
+    max_item: int
+    # updates.json ids already sent, so an unchanged list is not counted again
+    seen_updates: list[int] = field(default_factory=list)
+
+
+@dataclass
+class PollResult:
+    max_item: int
+    changed: int
+    triggered: bool
+    batches: int
+
+
+class HNSource(Protocol):
+    def max_item(self) -> int: ...
+
+    def updated_items(self) -> list[int]: ...
+
+
+class WatermarkStore(Protocol):
+    def get(self) -> Watermark | None: ...
+
+    def put(self, watermark: Watermark) -> None: ...
+
+
+class BatchQueue(Protocol):
+    def send(self, item_ids: list[int]) -> None: ...
+
+
+class HttpSource:
+    def __init__(self, base_url: str = HN_API_URL, timeout: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def fetch(self, endpoint: str) -> Any:
+        with urllib.request.urlopen(f"{self.base_url}/{endpoint}", timeout=self.timeout) as response:
+            return json.load(response)
+
+    def max_item(self) -> int:
+        return int(self.fetch("maxitem.json"))
+
+    def updated_items(self) -> list[int]:
+        return list((self.fetch("updates.json") or {}).get("items", []))
+
+
+class SsmWatermarkStore:
+    def __init__(self, name: str, client: Any = None):
+        if client is None:
+            import boto3
+
+            client = boto3.client("ssm")
+        self.name = name
+        self.client = client
+
+    def get(self) -> Watermark | None:
+        value = json.loads(self.client.get_parameter(Name=self.name)["Parameter"]["Value"])
+        # The stack creates the parameter as "{}": no poll has run yet
+        return Watermark(**value) if value else None
+
+    def put(self, watermark: Watermark) -> None:
+        self.client.put_parameter(Name=self.name, Value=json.dumps(asdict(watermark)), Overwrite=True)
+
+
+class SqsBatchQueue:
+    def __init__(self, url: str, client: Any = None):
+        if client is None:
+            import boto3
+
+            client = boto3.client("sqs")
+        self.url = url
+        self.client = client
+
+    def send(self, item_ids: list[int]) -> None:
+        self.client.send_message(QueueUrl=self.url, MessageBody=json.dumps({"item_ids": item_ids}))
+
+
+def poll(source: HNSource, store: WatermarkStore, queue: BatchQueue, threshold: int, batch_size: int) -> PollResult:
+    """Queue the items changed since the watermark if there are at least `threshold` of them.
+
+    New ids are the range between the stored and current max item, so none are
+    missed however long the trigger waits. Edits are only visible while they
+    are in updates.json. Below the threshold the watermark stays put and
+    changes keep accumulating.
+    """
+    max_item = source.max_item()
+    updated = sorted(set(source.updated_items()))
+    watermark = store.get()
+    if watermark is None:
+        # The first poll only sets the baseline; earlier history is the scheduled flow's job
+        store.put(Watermark(max_item, updated))
+        return PollResult(max_item, 0, False, 0)
+
+    seen = set(watermark.seen_updates)
+    changed = {*range(watermark.max_item + 1, max_item + 1), *(item_id for item_id in updated if item_id not in seen)}
+    if len(changed) < threshold:
+        return PollResult(max_item, len(changed), False, 0)
+
+    # Newest first, so the first run started picks up the freshest items
+    ordered = sorted(changed, reverse=True)
+    batches = [ordered[i:i + batch_size] for i in range(0, len(ordered), batch_size)]
+    for batch in batches:
+        queue.send(batch)
+    # Advanced only after every batch is queued: a failure in between re-sends rather than loses ids
+    store.put(Watermark(max_item, updated))
+    return PollResult(max_item, len(changed), True, len(batches))
+
+
+def execution_input(item_ids: list[int]) -> str:
+    """Step Functions input in the shape Metaflow's `step-functions trigger` sends."""
+    return json.dumps({"Parameters": json.dumps({"batch_ids": ",".join(map(str, item_ids))})})
+
+
+def launch(records: list[dict], start_execution: Any, state_machine_arn: str) -> list[str]:
+    names = []
+    for record in records:
+        item_ids = json.loads(record["body"])["item_ids"]
+        # Named after the message, so a redelivered message cannot start a second run
+        name = f"trigger-{record['messageId']}"
+        try:
+            start_execution(stateMachineArn=state_machine_arn, name=name, input=execution_input(item_ids))
+        except Exception as exc:
+            if type(exc).__name__ != "ExecutionAlreadyExists":
+                raise
+        names.append(name)
+    return names
+
+
+def poll_handler(event: dict, context: Any) -> dict:
+    result = poll(
+        HttpSource(os.environ.get("HN_API_URL", HN_API_URL)),
+        SsmWatermarkStore(os.environ["WATERMARK_PARAMETER"]),
+        SqsBatchQueue(os.environ["QUEUE_URL"]),
+        threshold=int(os.environ.get("CHANGE_THRESHOLD", "500")),
+        batch_size=int(os.environ.get("BATCH_SIZE", "2000")),
+    )
+    print(json.dumps(asdict(result)))
+    return asdict(result)
+
+
+def launch_handler(event: dict, context: Any) -> dict:
+    import boto3
+
+    names = launch(event["Records"], boto3.client("stepfunctions").start_execution, os.environ["STATE_MACHINE_ARN"])
+    return {"executions": names}
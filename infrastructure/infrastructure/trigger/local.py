@@ -0,0 +1,67 @@
+"""In-memory stand-ins for the trigger's AWS services, for tests and dry runs.
+
+`python -m infrastructure.trigger.local` (from the infrastructure directory)
+polls the live API with an in-memory watermark and queue and prints the
+executions the deployed trigger would start.
+"""
+
+import argparse
+import time
+from dataclasses import asdict
+
+from .handler import HttpSource, Watermark, execution_input, poll
+
+
+class MemoryWatermarkStore:
+    def __init__(self, watermark: Watermark | None = None):
+        self.watermark = watermark
+
+    def get(self) -> Watermark | None:
+        return self.watermark
+
+    def put(self, watermark: Watermark) -> None:
+        self.watermark = watermark
+
+
+class MemoryBatchQueue:
+    def __init__(self):
+        self.batches: list[list[int]] = []
+
+    def send(self, item_ids: list[int]) -> None:
+        self.batches.append(list(item_ids))
+
+
+class StaticSource:
+    """An HN API whose max item and updates list are set by the caller."""
+
+    def __init__(self, max_item: int, updated: list[int] | None = None):
+        self.max_item_id = max_item
+        self.updated = updated or []
+
+    def max_item(self) -> int:
+        return self.max_item_id
+
+    def updated_items(self) -> list[int]:
+        return list(self.updated)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threshold", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    parser.add_argument("--polls", type=int, default=3)
+    parser.add_argument("--interval", type=float, default=60.0, help="Seconds between polls")
+    args = parser.parse_args()
+
+    source, store, queue = HttpSource(), MemoryWatermarkStore(), MemoryBatchQueue()
+    for i in range(args.polls):
+        if i:
+            time.sleep(args.interval)
+        print(asdict(poll(source, store, queue, args.threshold, args.batch_size)))
+        while queue.batches:
+            batch = queue.batches.pop(0)
+            print(f"Would start HNIngestFlow with {len(batch)} ids: {execution_input(batch)[:120]}...")
+
+
+if __name__ == "__main__":
+    main()
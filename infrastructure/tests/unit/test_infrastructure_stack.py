@@ -4,13 +4,47 @@ from aws_cdk import assertions
 from infrastructure.infrastructure_stack import InfrastructureStack
 
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in infrastructure/infrastructure_stack.py
-def test_sqs_queue_created():
-    app = core.App()
+def synth(**context) -> assertions.Template:
+    app = core.App(context=context)
     stack = InfrastructureStack(app, "infrastructure")
-    template = assertions.Template.from_stack(stack)
+    return assertions.Template.from_stack(stack)
+
+
+def test_sqs_queue_created():
+    template = synth()
+
+    template.resource_count_is("AWS::SQS::Queue", 2)
+    template.has_resource_properties("AWS::SQS::Queue", {
+        "VisibilityTimeout": 60,
+        "RedrivePolicy": assertions.Match.object_like({"maxReceiveCount": 3}),
+    })
+
+
+def test_poller_scheduled_with_threshold():
+    template = synth(change_threshold=100, poll_minutes=10)
+
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Handler": "handler.poll_handler",
+        "Runtime": "python3.12",
+        "Environment": {"Variables": assertions.Match.object_like({"CHANGE_THRESHOLD": "100"})},
+    })
+    template.has_resource_properties("AWS::Events::Rule", {"ScheduleExpression": "rate(10 minutes)"})
+    template.has_resource_properties("AWS::SSM::Parameter", {"Type": "String", "Value": "{}"})
+
+
+def test_launcher_starts_state_machine():
+    arn = "arn:aws:states:us-east-1:123456789012:stateMachine:HNIngestFlow"
+    template = synth(ingest_state_machine_arn=arn)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+    template.has_resource_properties("AWS::Lambda::Function", {
+        "Handler": "handler.launch_handler",
+        "Environment": {"Variables": {"STATE_MACHINE_ARN": arn}},
+    })
+    template.has_resource_properties("AWS::Lambda::EventSourceMapping", {"BatchSize": 1})
+    template.has_resource_properties("AWS::IAM::Policy", {
+        "PolicyDocument": {
+            "Statement": assertions.Match.array_with([
+                assertions.Match.object_like({"Action": "states:StartExecution", "Resource": arn}),
+            ]),
+        },
+    })
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from infrastructure.trigger.handler import SsmWatermarkStore, Watermark, execution_input, launch, poll
+from infrastructure.trigger.local import MemoryBatchQueue, MemoryWatermarkStore, StaticSource
+
+
+def poll_once(source, store, queue, threshold=5, batch_size=3):
+    return poll(source, store, queue, threshold=threshold, batch_size=batch_size)
+
+
+def test_first_poll_sets_baseline_without_trigger():
+    store, queue = MemoryWatermarkStore(), MemoryBatchQueue()
+
+    result = poll_once(StaticSource(100, [90, 95]), store, queue)
+
+    assert not result.triggered
+    assert store.watermark == Watermark(100, [90, 95])
+    assert queue.batches == []
+
+
+def test_changes_accumulate_until_threshold():
+    store, queue = MemoryWatermarkStore(Watermark(100, [])), MemoryBatchQueue()
+    source = StaticSource(103)
+
+    assert not poll_once(source, store, queue).triggered
+    assert store.watermark == Watermark(100, [])
+
+    source.max_item_id = 105
+    result = poll_once(source, store, queue)
+
+    assert result.triggered
+    assert queue.batches == [[105, 104, 103], [102, 101]]
+    assert store.watermark == Watermark(105, [])
+
+
+def test_updates_counted_once():
+    store, queue = MemoryWatermarkStore(Watermark(100, [50, 60])), MemoryBatchQueue()
+    source = StaticSource(102, [50, 60, 70, 80, 90])
+
+    result = poll_once(source, store, queue)
+
+    assert result.changed == 5
+    assert queue.batches == [[102, 101, 90], [80, 70]]
+    assert store.watermark == Watermark(102, [50, 60, 70, 80, 90])
+
+    # The same updates list on the next poll is not a change
+    assert poll_once(source, store, queue).changed == 0
+
+
+def test_watermark_kept_when_queue_fails():
+    class FailingQueue:
+        def send(self, item_ids):
+            raise RuntimeError("queue unavailable")
+
+    store = MemoryWatermarkStore(Watermark(100, []))
+
+    with pytest.raises(RuntimeError):
+        poll_once(StaticSource(110), store, FailingQueue())
+    assert store.watermark == Watermark(100, [])
+
+
+def test_ssm_store_treats_initial_value_as_empty():
+    class FakeSsm:
+        value = "{}"
+
+        def get_parameter(self, Name):
+            return {"Parameter": {"Value": self.value}}
+
+        def put_parameter(self, Name, Value, Overwrite):
+            self.value = Value
+
+    store = SsmWatermarkStore("watermark", client=FakeSsm())
+
+    assert store.get() is None
+    store.put(Watermark(7, [3]))
+    assert store.get() == Watermark(7, [3])
+
+
+def test_execution_input_matches_metaflow_trigger():
+    parameters = json.loads(json.loads(execution_input([3, 2, 1]))["Parameters"])
+
+    assert parameters == {"batch_ids": "3,2,1"}
+
+
+def test_launch_starts_one_execution_per_message():
+    class ExecutionAlreadyExists(Exception):
+        pass
+
+    started = []
+
+    def start_execution(stateMachineArn, name, input):
+        if name in started:
+            raise ExecutionAlreadyExists(name)
+        started.append(name)
+
+    records = [
+        {"messageId": "a", "body": json.dumps({"item_ids": [3, 2]})},
+        {"messageId": "b", "body": json.dumps({"item_ids": [1]})},
+    ]
+
+    assert launch(records, start_execution, "arn") == ["trigger-a", "trigger-b"]
+    # A redelivered message is already running, not started again
+    assert launch(records[:1], start_execution, "arn") == ["trigger-a"]
+    assert started == ["trigger-a", "trigger-b"]
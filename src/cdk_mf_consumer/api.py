@@ -1,6 +1,6 @@
 from cdk_mf_consumer.client import HNClient
 from cdk_mf_consumer.models.base_models import HNItem
-from cdk_mf_consumer.models.response_models import MaxItemResponse, UpdatesResponse
+from cdk_mf_consumer.models.response_models import ItemListResponse, MaxItemResponse, UpdatesResponse
 from cdk_mf_consumer.models.user_models import HNUser
 
 client = HNClient()
@@ -16,3 +16,6 @@ def get_max_item_id() -> MaxItemResponse | None:
 
 def get_updates() -> UpdatesResponse | None:
     return client.get_updates()
+
+def get_story_list(name: str) -> ItemListResponse | None:
+    return client.get_story_list(name)
@@ -0,0 +1,187 @@
+import atexit
+import json
+import mmap
+import os
+import random
+import struct
+from collections.abc import Callable
+from pathlib import Path
+from time import sleep
+
+import httpx
+
+Latency = Callable[[], float]
+
+
+class CassetteMissError(httpx.TransportError):
+    pass
+
+
+class Cassette:
+    """Recorded responses in one file, indexed by request and read through mmap.
+
+    Layout: MAGIC, the response bodies back to back, a JSON index mapping each
+    request key to [offset, length, status], then the index offset as an
+    8-byte little-endian integer. Replay maps the file and slices bodies out of
+    it on demand, so opening a large cassette costs one index parse.
+    """
+
+    MAGIC = b"HNCASSETTE1\n"
+    TRAILER = struct.Struct("<Q")
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.index: dict[str, tuple[int, int, int]] = {}
+        self.recorded: dict[str, tuple[int, bytes]] = {}
+        self.buffer: mmap.mmap | None = None
+        if self.path.exists():
+            self.open()
+
+    def open(self) -> None:
+        with self.path.open("rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.buffer[: len(self.MAGIC)] != self.MAGIC:
+            raise ValueError(f"{self.path} is not a cassette file")
+        (index_offset,) = self.TRAILER.unpack(self.buffer[-self.TRAILER.size :])
+        index = json.loads(self.buffer[index_offset : -self.TRAILER.size])
+        self.index = {key: tuple(entry) for key, entry in index.items()}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.recorded or key in self.index
+
+    def __len__(self) -> int:
+        return len(self.index.keys() | self.recorded.keys())
+
+    def get(self, key: str) -> tuple[int, bytes] | None:
+        if key in self.recorded:
+            return self.recorded[key]
+        if key not in self.index or self.buffer is None:
+            return None
+        offset, length, status = self.index[key]
+        return status, self.buffer[offset : offset + length]
+
+    def put(self, key: str, status: int, body: bytes) -> None:
+        self.recorded[key] = (status, body)
+
+    def save(self) -> None:
+        """Write previously stored and newly recorded responses to a fresh file."""
+        entries = {key: self.get(key) for key in self.index.keys() | self.recorded.keys()}
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        index = {}
+        with tmp_path.open("wb") as f:
+            f.write(self.MAGIC)
+            for key in sorted(entries):
+                status, body = entries[key]
+                index[key] = [f.tell(), len(body), status]
+                f.write(body)
+            index_offset = f.tell()
+            f.write(json.dumps(index, separators=(",", ":")).encode())
+            f.write(self.TRAILER.pack(index_offset))
+        self.close()
+        tmp_path.replace(self.path)
+        self.recorded = {}
+        self.open()
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+            self.buffer = None
+
+
+def request_key(request: httpx.Request) -> str:
+    # Keyed by endpoint only, so a cassette replays against any base URL host
+    return f"{request.method} {request.url.raw_path.decode()}"
+
+
+def constant_latency(seconds: float) -> Latency:
+    return lambda: seconds
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: int | None = None) -> Latency:
+    """Right-skewed latencies around median seconds, the usual shape of API response times."""
+    rng = random.Random(seed)
+    return lambda: rng.lognormvariate(0.0, sigma) * median
+
+
+def parse_latency(spec: str) -> Latency | None:
+    """Parse "constant:<ms>" or "lognormal:<median ms>[,<sigma>]"."""
+    if not spec:
+        return None
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "constant" and len(values) == 1:
+        return constant_latency(values[0] / 1000)
+    if kind == "lognormal" and len(values) in (1, 2):
+        return lognormal_latency(values[0] / 1000, *values[1:])
+    raise ValueError(f"Invalid latency spec: {spec!r}")
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """httpx transport that records responses to a cassette, or replays them offline.
+
+    In record mode requests go through the wrapped transport and every response
+    is captured; the cassette is written on close (and at interpreter exit),
+    merged with anything it already held. In replay mode no network is used:
+    unrecorded requests raise CassetteMissError, and an optional latency
+    function adds a synthetic delay per response.
+    """
+
+    MODES = ("record", "replay")
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "replay",
+        *,
+        latency: Latency | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(f"Invalid cassette mode: {mode}. Must be one of {self.MODES}")
+        self.mode = mode
+        self.latency = latency
+        self.cassette = Cassette(path)
+        self.transport = transport or httpx.HTTPTransport()
+        self.closed = False
+        if mode == "record":
+            atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls) -> "CassetteTransport | None":
+        """Build from HN_CASSETTE, HN_CASSETTE_MODE and HN_CASSETTE_LATENCY, so flows need no code changes."""
+        path = os.environ.get("HN_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            os.environ.get("HN_CASSETTE_MODE", "replay"),
+            latency=parse_latency(os.environ.get("HN_CASSETTE_LATENCY", "")),
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(request)
+        if self.mode == "record":
+            response = self.transport.handle_request(request)
+            body = response.read()
+            response.close()
+            self.cassette.put(key, response.status_code, body)
+            return httpx.Response(response.status_code, content=body, request=request)
+
+        entry = self.cassette.get(key)
+        if entry is None:
+            raise CassetteMissError(f"No recorded response for {key}", request=request)
+        if self.latency is not None:
+            sleep(self.latency())
+        status, body = entry
+        return httpx.Response(status, content=body, request=request)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self.mode == "record":
+            self.cassette.save()
+            atexit.unregister(self.close)
+        self.cassette.close()
+        self.transport.close()
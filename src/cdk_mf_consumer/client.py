@@ -1,20 +1,45 @@
+import json
 from typing import Any, Optional
 
 import httpx
 from loguru import logger
+from pydantic import ValidationError
 from tenacity import retry, stop_after_attempt, wait_exponential
 
-from cdk_mf_consumer.models.base_models import (
-    HNCommentItem,
-    HNItem,
-    HNJobItem,
-    HNPollItem,
-    HNPollOptItem,
-    HNStoryItem,
-)
-from cdk_mf_consumer.models.response_models import MaxItemResponse, UpdatesResponse
+from cdk_mf_consumer.cassette import CassetteTransport
+from cdk_mf_consumer.models import HNItemAdapter
+from cdk_mf_consumer.models.base_models import HNItem
+from cdk_mf_consumer.models.response_models import ItemListResponse, MaxItemResponse, UpdatesResponse
 from cdk_mf_consumer.models.user_models import HNUser
 
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:  # pragma: no cover - orjson is an optional speedup
+    json_loads = json.loads
+
+# Ranking lists served as /v0/<name>stories.json
+STORY_LISTS = ("top", "new", "best", "ask", "show", "job")
+
+# The API answers requests for missing items and users with a JSON null
+NULL_BODY = b"null"
+
+
+def parse_item(raw: bytes) -> HNItem | None:
+    """Validate item JSON straight from the response buffer, dispatching on "type".
+
+    Items of a type the models do not know are skipped with a warning, like
+    missing ones; any other invalid payload raises ValidationError.
+    """
+    try:
+        return HNItemAdapter.validate_json(raw)
+    except ValidationError as e:
+        if any(error["type"] == "union_tag_invalid" for error in e.errors()):
+            logger.warning("Unknown item type, skipping item")
+            return None
+        raise
+
 
 class HNClient:
 
@@ -24,18 +49,29 @@ class HNClient:
 
     def __init__(self):
         if not hasattr(self, "client"):
-            self.client = httpx.Client(
-                timeout=httpx.Timeout(
-                    connect=5.0,
-                    read=60.0,
-                    write=5.0,
-                    pool=10.0,
-                ),
-                limits=httpx.Limits(
-                    max_keepalive_connections=10,
-                    max_connections=20,
-                ),
-            )
+            # HN_CASSETTE switches every client in the process to record/replay
+            self.client = self.build_client(CassetteTransport.from_env())
+
+    @staticmethod
+    def build_client(transport: httpx.BaseTransport | None = None) -> httpx.Client:
+        return httpx.Client(
+            transport=transport,
+            timeout=httpx.Timeout(
+                connect=5.0,
+                read=60.0,
+                write=5.0,
+                pool=10.0,
+            ),
+            limits=httpx.Limits(
+                max_keepalive_connections=10,
+                max_connections=20,
+            ),
+        )
+
+    def use_transport(self, transport: httpx.BaseTransport | None) -> None:
+        """Route all requests through transport, e.g. a CassetteTransport for offline runs."""
+        self.client.close()
+        self.client = self.build_client(transport)
 
     def __new__(cls) -> "HNClient":
         if cls._instance is None:
@@ -52,11 +88,12 @@ class HNClient:
         wait=wait_exponential(multiplier=1, min=4, max=10),
         reraise=True,
     )
-    def _get(self, endpoint: str) -> Any:
+    def _get(self, endpoint: str, *, raw: bool = False) -> Any:
+        """Fetch an endpoint, returning decoded JSON or, with raw=True, the undecoded body."""
         try:
             response = self.client.get(f"{self.base_url}/{endpoint}")
             response.raise_for_status()
-            return response.json()
+            return response.content if raw else json_loads(response.content)
         except httpx.TimeoutException as e:
             logger.warning(f"Timeout accessing {endpoint}: {e!s}")
             raise
@@ -64,36 +101,25 @@ class HNClient:
             logger.error(f"HTTP error accessing {endpoint}: {e!s}")
             raise
 
+    def get_item_raw(self, item_id: int) -> bytes | None:
+        """Undecoded item JSON, or None for a missing item. HTTP errors propagate."""
+        raw = self._get(f"item/{item_id}.json", raw=True)
+        return None if raw.strip() == NULL_BODY else raw
+
     def get_item(self, item_id: int) -> HNItem | None:
         try:
-            data = self._get(f"item/{item_id}.json")
-            if not data:
-                return None
-
-            item_type = data.get("type")
-            if item_type == "story":
-                return HNStoryItem(**data)
-            elif item_type == "comment":
-                return HNCommentItem(**data)
-            elif item_type == "job":
-                return HNJobItem(**data)
-            elif item_type == "poll":
-                return HNPollItem(**data)
-            elif item_type == "pollopt":
-                return HNPollOptItem(**data)
-            else:
-                logger.warning(f"Unknown item type: {item_type}")
-                return None
+            raw = self.get_item_raw(item_id)
+            return parse_item(raw) if raw is not None else None
         except Exception as e:
             logger.error(f"Error getting item {item_id}: {e!s}")
             return None
 
     def get_user(self, username: str) -> HNUser | None:
         try:
-            data = self._get(f"user/{username}.json")
-            if not data:
+            raw = self._get(f"user/{username}.json", raw=True)
+            if raw.strip() == NULL_BODY:
                 return None
-            return HNUser(**data)
+            return HNUser.model_validate_json(raw)
         except Exception as e:
             logger.error(f"Error getting user {username}: {e!s}")
             return None
@@ -116,3 +142,32 @@ class HNClient:
             logger.error(f"Error getting updates: {e!s}")
             return None
 
+    def get_story_list(self, name: str) -> ItemListResponse | None:
+        if name not in STORY_LISTS:
+            raise ValueError(f"Invalid story list: {name}. Must be one of {STORY_LISTS}")
+        try:
+            data = self._get(f"{name}stories.json")
+            if data is None:
+                return None
+            return ItemListResponse(items=data)
+        except Exception as e:
+            logger.error(f"Error getting {name} stories: {e!s}")
+            return None
+
+    def get_top_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("top")
+
+    def get_new_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("new")
+
+    def get_best_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("best")
+
+    def get_ask_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("ask")
+
+    def get_show_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("show")
+
+    def get_job_stories(self) -> ItemListResponse | None:
+        return self.get_story_list("job")
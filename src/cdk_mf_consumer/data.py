@@ -1,10 +1,12 @@
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import polars as pl
 
-from cdk_mf_consumer.client import HNClient
+from cdk_mf_consumer.client import STORY_LISTS, HNClient, parse_item
+from cdk_mf_consumer.features import enrich_frame
 from cdk_mf_consumer.models.base_models import (
     HNCommentItem,
     HNItem,
@@ -13,7 +15,7 @@ from cdk_mf_consumer.models.base_models import (
     HNPollOptItem,
     HNStoryItem,
 )
-from cdk_mf_consumer.models.response_models import UpdatesResponse
+from cdk_mf_consumer.models.response_models import ItemListResponse, UpdatesResponse
 from cdk_mf_consumer.models.user_models import HNUser
 
 
@@ -118,7 +120,7 @@ class HNData:
         return grouped
 
     def items_to_frames(
-        self, items: Sequence[HNItem]
+        self, items: Sequence[HNItem], *, enrich: bool = False
     ) -> dict[str, pl.DataFrame | None]:
         grouped = self.group_items_by_type(items)
         frames = {}
@@ -153,9 +155,19 @@ class HNData:
                 [item.model_dump() for item in grouped["pollopt"]],
                 schema=self.pollopt_schema
             )
+
+        if enrich:
+            frames = self.enrich_frames(frames)
         
         return frames
 
+    def enrich_frames(self, frames: dict[str, pl.DataFrame | None]) -> dict[str, pl.DataFrame | None]:
+        # Derived columns (domain, cleaned text, lengths, kid counts, Ask/Show flags)
+        return {
+            item_type: enrich_frame(item_type, df) if df is not None else None
+            for item_type, df in frames.items()
+        }
+
     def users_to_frame(self, users: Sequence[HNUser], timestamp: datetime | None = None) -> pl.DataFrame:
         data = []
         fetch_time = timestamp or datetime.now()
@@ -175,6 +187,22 @@ class HNData:
         data["timestamp"] = datetime.now()  # Add timestamp when data was collected
         return pl.DataFrame([data], schema=schema)
 
+    def rankings_to_frame(self, lists: dict[str, ItemListResponse], snapshot_time: datetime) -> pl.DataFrame:
+        # One row per (list, rank); list names are an Enum and ranks fit in 16 bits (lists hold at most 500 ids)
+        schema = {
+            "list": pl.Enum(STORY_LISTS),
+            "rank": pl.UInt16,
+            "id": pl.Int64,
+            "snapshot_time": pl.Datetime,
+        }
+        data = {
+            "list": [name for name, response in lists.items() for _ in response.items],
+            "rank": [rank for response in lists.values() for rank in range(1, len(response.items) + 1)],
+            "id": [item_id for response in lists.values() for item_id in response.items],
+            "snapshot_time": [snapshot_time] * sum(len(response.items) for response in lists.values()),
+        }
+        return pl.DataFrame(data, schema=schema)
+
     def write_parquet(
         self,
         df: pl.DataFrame,
@@ -192,10 +220,12 @@ class HNData:
 
 
 def process_batch(client: HNClient, item_ids: list[int], stats: dict) -> list[HNItem]:
+    # Fetch errors and invalid payloads count as failed; missing items and unknown types as not found
     items = []
     for item_id in item_ids:
         try:
-            if item := client.get_item(item_id):
+            raw = client.get_item_raw(item_id)
+            if raw is not None and (item := parse_item(raw)):
                 items.append(item)
                 stats["success"] += 1
                 # Track type-specific success
@@ -207,6 +237,39 @@ def process_batch(client: HNClient, item_ids: list[int], stats: dict) -> list[HN
     return items
 
 
+def hydrate_items(client: HNClient, item_ids: Sequence[int], stats: dict, max_workers: int = 16) -> list[HNItem]:
+    """Fetch each distinct id once, spreading the fetches over a thread pool."""
+    unique_ids = list(dict.fromkeys(item_ids))
+    if not unique_ids:
+        return []
+    chunk_size = -(-len(unique_ids) // max_workers)
+    chunks = [unique_ids[i:i + chunk_size] for i in range(0, len(unique_ids), chunk_size)]
+    # Each chunk counts into its own stats dict, merged afterwards, so threads never share a counter
+    chunk_stats: list[dict] = [{"success": 0, "failed": 0, "not_found": 0} for _ in chunks]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        batches = list(executor.map(lambda args: process_batch(client, *args), zip(chunks, chunk_stats)))
+
+    for counts in chunk_stats:
+        for key, count in counts.items():
+            stats[key] = stats.get(key, 0) + count
+    return [item for batch in batches for item in batch]
+
+
+def process_raw_batch(client: HNClient, item_ids: list[int], stats: dict) -> list[bytes]:
+    # Fetch only; decode_items counts successes, invalid payloads and unknown types
+    payloads = []
+    for item_id in item_ids:
+        try:
+            if (raw := client.get_item_raw(item_id)) is not None:
+                payloads.append(raw)
+            else:
+                stats["not_found"] += 1
+        except Exception:
+            stats["failed"] += 1
+    return payloads
+
+
 def process_user_batch(client: HNClient, usernames: list[str], stats: dict) -> list[HNUser]:
     users = []
     for username in usernames:
@@ -0,0 +1,83 @@
+import polars as pl
+
+# Tags and entities emitted by the HN API in item text. Replacement happens in a
+# single left-to-right pass, so "&amp;lt;" correctly becomes "&lt;" and not "<".
+HTML_REPLACEMENTS = {
+    "<p>": "\n\n",
+    "<i>": "",
+    "</i>": "",
+    "<pre>": "",
+    "</pre>": "",
+    "<code>": "",
+    "</code>": "",
+    "</a>": "",
+    "&amp;": "&",
+    "&lt;": "<",
+    "&gt;": ">",
+    "&quot;": '"',
+    "&#x27;": "'",
+    "&#39;": "'",
+    "&#x2F;": "/",
+    "&#47;": "/",
+    "&#x22;": '"',
+    "&#34;": '"',
+    "&nbsp;": " ",
+}
+
+# Opening links are the only HN tag with variable content (href, rel)
+HTML_LINK_PATTERN = r"<a\s[^>]*>"
+URL_HOST_PATTERN = r"^[A-Za-z][A-Za-z0-9+.\-]*://(?:[^@/?#]*@)?([^:/?#]+)"
+
+
+def url_domain(column: str = "url") -> pl.Expr:
+    return (
+        pl.col(column)
+        .str.extract(URL_HOST_PATTERN, 1)
+        .str.to_lowercase()
+        .str.strip_prefix("www.")
+    )
+
+
+def clean_text(column: str = "text") -> pl.Expr:
+    """HN text is HTML limited to <p>, <i>, <pre>, <code> and <a> tags.
+
+    Only the opening <a> needs a regex; every other tag and entity is handled by
+    one literal multi-pattern pass.
+    """
+    return (
+        pl.col(column)
+        .str.replace_all(HTML_LINK_PATTERN, "")
+        .str.replace_many(list(HTML_REPLACEMENTS), list(HTML_REPLACEMENTS.values()))
+    )
+
+
+def word_count(column: str) -> pl.Expr:
+    return pl.col(column).str.count_matches(r"\S+").cast(pl.Int32)
+
+
+def title_prefix(prefix: str, column: str = "title") -> pl.Expr:
+    return pl.col(column).str.contains(rf"(?i)^\s*{prefix}\b").fill_null(False)
+
+
+def enrich_frame(item_type: str, df: pl.DataFrame) -> pl.DataFrame:
+    columns = set(df.columns)
+    derived = [pl.col("kids").list.len().cast(pl.Int32).alias("kid_count")]
+
+    if "url" in columns:
+        derived.append(url_domain().alias("domain"))
+    if "title" in columns:
+        derived.append(pl.col("title").str.len_chars().cast(pl.Int32).alias("title_length"))
+    if item_type == "story":
+        derived.append(title_prefix("ask hn").alias("is_ask"))
+        derived.append(title_prefix("show hn").alias("is_show"))
+    if "text" in columns:
+        derived.append(clean_text().alias("text_clean"))
+
+    df = df.with_columns(derived)
+
+    if "text" in columns:
+        df = df.with_columns(
+            pl.col("text_clean").str.len_chars().cast(pl.Int32).alias("text_length"),
+            word_count("text_clean").alias("word_count"),
+        )
+    return df
@@ -5,7 +5,11 @@ from time import sleep
 from metaflow import FlowSpec, Parameter, step
 
 from cdk_mf_consumer.client import HNClient
-from cdk_mf_consumer.data import HNData, process_batch, process_user_batch
+from cdk_mf_consumer.data import HNData, process_batch, process_raw_batch, process_user_batch
+from cdk_mf_consumer.pipeline import DecodePool
+from cdk_mf_consumer.profiling import profiled
+from cdk_mf_consumer.rollups import RollupStore
+from cdk_mf_consumer.scheduler import FetchQueue, FetchScheduler
 from cdk_mf_consumer.utils import get_partitioned_path
 
 
@@ -14,9 +18,52 @@ class HNIngestFlow(FlowSpec):
     BATCH_SIZE = 50
     RATE_LIMIT_DELAY = 0.5
     OUTPUT_DIR = "data/raw"
-    
+
+    enrich = Parameter(
+        "enrich",
+        help="Add derived feature columns (domain, cleaned text, lengths) to item frames",
+        type=bool,
+        default=False,
+    )
+    rollups = Parameter(
+        "rollups",
+        help="Merge this run's items and users into the rollup tables next to the output directory",
+        type=bool,
+        default=False,
+    )
+    profile = Parameter(
+        "profile",
+        help="Profile each step: 'cpu' (cProfile and folded stacks) or 'mem' (tracemalloc); empty disables",
+        type=str,
+        default="",
+    )
+    decode_workers = Parameter(
+        "decode_workers",
+        help="Decode and build item frames in this many worker processes (0 decodes in the step itself)",
+        type=int,
+        default=0,
+    )
+    time_budget = Parameter(
+        "time_budget",
+        help="Seconds allowed for fetching items; ids that would not finish in time are queued for the next run (0 is unlimited)",
+        type=float,
+        default=0,
+    )
+    request_budget = Parameter(
+        "request_budget",
+        help="Maximum item requests per run; the rest are queued for the next run (0 is unlimited)",
+        type=int,
+        default=0,
+    )
+    batch_ids = Parameter(
+        "batch_ids",
+        help="Comma-separated item ids to ingest instead of the updates list (set by the event trigger)",
+        type=str,
+        default="",
+    )
 
     @step
+    @profiled
     def start(self):
         print("Starting HN data ingestion")
         self.output_dir = Path(self.OUTPUT_DIR)
@@ -30,35 +77,72 @@ class HNIngestFlow(FlowSpec):
         }
         self.user_stats = {"success": 0, "failed": 0, "not_found": 0}
         self.start_time = datetime.now()
+        self.queue_path = self.output_dir.parent / "queue" / "items.json"
         
         self.next(self.get_updates)
 
     @step
+    @profiled
     def get_updates(self):
         """Fetch updates from HackerNews API."""
         client = HNClient()
         self.updates = client.get_updates()
-        
-        if not self.updates or not self.updates.items:
+        carried = FetchQueue(self.queue_path).load()
+        if self.batch_ids:
+            # Started by the event trigger with the changed ids; updates still supply the profiles
+            changed = [int(item_id) for item_id in self.batch_ids.split(",")]
+        else:
+            changed = self.updates.items if self.updates else []
+        item_ids = [*changed, *carried]
+
+        # New items go ahead of refreshes, which only rollup state can tell apart
+        stored = set()
+        if self.rollups and item_ids:
+            stored = RollupStore(self.output_dir.parent / "rollups").known_ids(item_ids)
+        self.item_ids = FetchScheduler.prioritize(item_ids, stored)
+
+        if not self.item_ids:
             print("No updates available")
         else:
-            print(f"Processing {len(self.updates.items)} items in batches of {self.BATCH_SIZE}")
+            print(
+                f"Processing {len(self.item_ids)} items in batches of {self.BATCH_SIZE} | "
+                f"Carried over: {len(carried)} | Already stored: {len(stored)}"
+            )
         self.next(self.process_items)
 
     @step
+    @profiled
     def process_items(self):
+        scheduler = FetchScheduler(time_budget=self.time_budget, request_budget=self.request_budget)
+        # item_frames is the only item artifact, whichever path decoded the items
+        if self.decode_workers > 0:
+            self.item_frames = self.process_items_in_pool(scheduler)
+        else:
+            items = self.process_items_in_step(scheduler)
+            self.item_frames = HNData().items_to_frames(items, enrich=self.enrich)
+
+        self.deferred_ids = scheduler.deferred
+        if self.deferred_ids:
+            print(
+                f"Budget reached after {scheduler.requests} requests in {scheduler.elapsed:.1f}s "
+                f"({scheduler.requests_per_second:.1f} req/s); deferring {len(self.deferred_ids)} items to the next run"
+            )
+
+        self.next(self.process_users)
+
+    def process_items_in_step(self, scheduler):
         client = HNClient()
-        self.all_items = []
+        all_items = []
+        current = 0
         
-        for i in range(0, len(self.updates.items), self.BATCH_SIZE):
-            batch_items = self.updates.items[i:i + self.BATCH_SIZE]
+        for batch_items in scheduler.batches(self.item_ids, self.BATCH_SIZE):
             items = process_batch(client, batch_items, self.item_stats)
-            self.all_items.extend(items)
+            all_items.extend(items)
             
-            current = i + len(batch_items)
+            current += len(batch_items)
             success_rate = (self.item_stats["success"] / current) * 100 if current > 0 else 0
             print(
-                f"Items Progress: {current}/{len(self.updates.items)} ({current/len(self.updates.items)*100:.1f}%) | "
+                f"Items Progress: {current}/{len(self.item_ids)} ({current/len(self.item_ids)*100:.1f}%) | "
                 f"Success: {self.item_stats['success']} ({success_rate:.1f}%) | "
                 f"By Type: Stories={self.item_stats['success_story']}, "
                 f"Comments={self.item_stats['success_comment']}, "
@@ -68,12 +152,43 @@ class HNIngestFlow(FlowSpec):
                 f"Failed: {self.item_stats['failed']} | Not Found: {self.item_stats['not_found']}"
             )
             
-            if i + self.BATCH_SIZE < len(self.updates.items):
+            if current < len(self.item_ids):
                 sleep(self.RATE_LIMIT_DELAY)
         
-        self.next(self.process_users)
+        return all_items
+
+    def process_items_in_pool(self, scheduler):
+        client = HNClient()
+        current = 0
+
+        with DecodePool(self.decode_workers, enrich=self.enrich) as pool:
+            for batch_items in scheduler.batches(self.item_ids, self.BATCH_SIZE):
+                pool.submit(process_raw_batch(client, batch_items, self.item_stats))
+
+                current += len(batch_items)
+                print(
+                    f"Items Fetched: {current}/{len(self.item_ids)} ({current/len(self.item_ids)*100:.1f}%) | "
+                    f"Not Found: {self.item_stats['not_found']}"
+                )
+
+                if current < len(self.item_ids):
+                    sleep(self.RATE_LIMIT_DELAY)
+
+            item_frames = pool.collect(self.item_stats)
+
+        print(
+            f"Items Decoded: Success: {self.item_stats['success']} | "
+            f"By Type: Stories={self.item_stats['success_story']}, "
+            f"Comments={self.item_stats['success_comment']}, "
+            f"Jobs={self.item_stats['success_job']}, "
+            f"Polls={self.item_stats['success_poll']}, "
+            f"PollOpts={self.item_stats['success_pollopt']} | "
+            f"Failed: {self.item_stats['failed']}"
+        )
+        return item_frames
 
     @step
+    @profiled
     def process_users(self):
         client = HNClient()
         self.all_users = []
@@ -98,22 +213,25 @@ class HNIngestFlow(FlowSpec):
         self.next(self.save_data)
 
     @step
+    @profiled
     def save_data(self):
-        if not self.all_items and not self.all_users:
+        if not self.item_frames and not self.all_users:
             print("No items or users were successfully processed")
             self.output_paths = {}
-            self.next(self.end)
+            self.saved_at = datetime.now()
+            FetchQueue(self.queue_path).save(self.deferred_ids)
+            self.next(self.update_rollups)
             return
             
         self.output_paths = {}
         hn_data = HNData()
         timestamp = datetime.now()
+        # Shared with update_rollups so karma days match the raw users partition
+        self.saved_at = timestamp
         timestamp_str = timestamp.strftime("%Y%m%d_%H%M%S")
         
-        if self.all_items:
-            item_frames = hn_data.items_to_frames(self.all_items)
-            
-            for item_type, df in item_frames.items():
+        if self.item_frames:
+            for item_type, df in self.item_frames.items():
                 if df is not None:
                     plural_type = HNData.get_plural_form(item_type)
                     partitioned_path = get_partitioned_path(self.output_dir, plural_type, timestamp)
@@ -132,10 +250,28 @@ class HNIngestFlow(FlowSpec):
             print(f"Writing {len(users_df)} users to {users_path}")
             hn_data.write_parquet(users_df, users_path, compression="snappy")
             self.output_paths["user"] = users_path
-            
+
+        # Written only once this run's items are saved, so a failed run keeps the previous queue
+        FetchQueue(self.queue_path).save(self.deferred_ids)
+        self.next(self.update_rollups)
+
+    @step
+    @profiled
+    def update_rollups(self):
+        self.rollup_paths = {}
+        if not self.rollups or (not self.item_frames and not self.all_users):
+            self.next(self.end)
+            return
+
+        users_df = HNData().users_to_frame(self.all_users, self.saved_at) if self.all_users else None
+        self.rollup_paths = RollupStore(self.output_dir.parent / "rollups").update(self.item_frames, users_df)
+        for table, paths in self.rollup_paths.items():
+            print(f"Updated {len(paths)} {table} partitions")
+
         self.next(self.end)
 
     @step
+    @profiled
     def end(self):
         pass
 
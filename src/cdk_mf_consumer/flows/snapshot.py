@@ -0,0 +1,103 @@
+from datetime import datetime
+from pathlib import Path
+
+from metaflow import FlowSpec, Parameter, step
+
+from cdk_mf_consumer.client import STORY_LISTS, HNClient
+from cdk_mf_consumer.data import HNData, hydrate_items
+from cdk_mf_consumer.profiling import profiled
+from cdk_mf_consumer.utils import get_partitioned_path
+
+
+class HNSnapshotFlow(FlowSpec):
+
+    OUTPUT_DIR = "data/raw"
+
+    max_workers = Parameter(
+        "max_workers",
+        help="Concurrent item fetches while hydrating the ranked stories",
+        type=int,
+        default=16,
+    )
+    profile = Parameter(
+        "profile",
+        help="Profile each step: 'cpu' (cProfile and folded stacks) or 'mem' (tracemalloc); empty disables",
+        type=str,
+        default="",
+    )
+
+    @step
+    @profiled
+    def start(self):
+        print("Starting HN ranking snapshot")
+        self.output_dir = Path(self.OUTPUT_DIR)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.item_stats = {"success": 0, "failed": 0, "not_found": 0}
+        self.next(self.fetch_lists)
+
+    @step
+    @profiled
+    def fetch_lists(self):
+        """Fetch all six ranking lists at (nearly) the same instant."""
+        client = HNClient()
+        self.snapshot_time = datetime.now()
+        self.lists = {}
+        for name in STORY_LISTS:
+            if response := client.get_story_list(name):
+                self.lists[name] = response
+            else:
+                print(f"Skipping {name} stories: list unavailable")
+
+        listed = sum(len(response.items) for response in self.lists.values())
+        self.item_ids = sorted({item_id for response in self.lists.values() for item_id in response.items})
+        print(f"Fetched {len(self.lists)} lists with {listed} entries covering {len(self.item_ids)} distinct items")
+        self.next(self.hydrate)
+
+    @step
+    @profiled
+    def hydrate(self):
+        # Ids repeat across lists (a story is often in top, new and best); each is fetched once
+        items = hydrate_items(HNClient(), self.item_ids, self.item_stats, self.max_workers)
+        self.item_frames = HNData().items_to_frames(items)
+        print(
+            f"Hydrated {self.item_stats['success']}/{len(self.item_ids)} items | "
+            f"Failed: {self.item_stats['failed']} | Not Found: {self.item_stats['not_found']}"
+        )
+        self.next(self.save_snapshot)
+
+    @step
+    @profiled
+    def save_snapshot(self):
+        hn_data = HNData()
+        timestamp_str = self.snapshot_time.strftime("%Y%m%d_%H%M%S")
+        self.output_paths = {}
+
+        if self.lists:
+            rankings = hn_data.rankings_to_frame(self.lists, self.snapshot_time)
+            partitioned_path = get_partitioned_path(self.output_dir, "rankings", self.snapshot_time)
+            partitioned_path.mkdir(parents=True, exist_ok=True)
+            output_path = partitioned_path / f"{timestamp_str}.parquet"
+            print(f"Writing {len(rankings)} ranking rows to {output_path}")
+            hn_data.write_parquet(rankings, output_path, compression="zstd")
+            self.output_paths["rankings"] = output_path
+
+        for item_type, df in self.item_frames.items():
+            if df is not None:
+                plural_type = HNData.get_plural_form(item_type)
+                partitioned_path = get_partitioned_path(self.output_dir, plural_type, self.snapshot_time)
+                partitioned_path.mkdir(parents=True, exist_ok=True)
+                output_path = partitioned_path / f"{timestamp_str}.parquet"
+                print(f"Writing {len(df)} {plural_type} to {output_path}")
+                hn_data.write_parquet(df, output_path, compression="snappy")
+                self.output_paths[item_type] = output_path
+
+        self.next(self.end)
+
+    @step
+    @profiled
+    def end(self):
+        pass
+
+
+if __name__ == "__main__":
+    HNSnapshotFlow()
@@ -1,3 +1,10 @@
+from typing import Annotated
+
+from pydantic import Field, TypeAdapter
+
 from cdk_mf_consumer.models.base_models import HNCommentItem, HNJobItem, HNPollItem, HNPollOptItem, HNStoryItem
 
 HNAnyItem = HNStoryItem | HNCommentItem | HNJobItem | HNPollItem | HNPollOptItem
+
+# Validates any item JSON straight from bytes, picking the model from its "type" field
+HNItemAdapter: TypeAdapter[HNAnyItem] = TypeAdapter(Annotated[HNAnyItem, Field(discriminator="type")])
@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import sys
+import tempfile
+import uuid
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import polars as pl
+from pydantic import ValidationError
+
+from cdk_mf_consumer.client import parse_item
+from cdk_mf_consumer.data import HNData
+
+
+def free_threaded() -> bool:
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def write_ipc_file(df: pl.DataFrame, spill_dir: str) -> str:
+    path = Path(spill_dir) / f"{uuid.uuid4().hex}.arrow"
+    # Uncompressed so the parent can memory-map the buffers instead of decoding them
+    df.write_ipc(path, compression="uncompressed")
+    return str(path)
+
+
+def read_ipc_file(path: str) -> pl.DataFrame:
+    # Uncompressed local IPC files are memory-mapped by polars, so columns are
+    # backed by the page cache rather than copied into the parent's heap
+    return pl.read_ipc(path)
+
+
+def decode_items(
+    payloads: Sequence[bytes], spill_dir: str, enrich: bool = False
+) -> tuple[dict[str, str], dict[str, int]]:
+    """Worker entry point: validate raw item JSON and build per-type frames.
+
+    Frames are written as Arrow IPC files in spill_dir and only their paths
+    travel back over the executor pipe.
+    """
+    items = []
+    stats: Counter[str] = Counter()
+    for raw in payloads:
+        try:
+            item = parse_item(raw)
+        except ValidationError:
+            stats["failed"] += 1
+            continue
+        # Same accounting as process_batch: unknown item types count as not found
+        if item is None:
+            stats["not_found"] += 1
+            continue
+        items.append(item)
+        stats["success"] += 1
+        stats[f"success_{item.type}"] += 1
+
+    frames = HNData().items_to_frames(items, enrich=enrich)
+    return (
+        {item_type: write_ipc_file(df, spill_dir) for item_type, df in frames.items() if df is not None},
+        dict(stats),
+    )
+
+
+class DecodePool:
+    """Decodes, validates and builds item frames for raw response batches on other cores.
+
+    Batches are submitted as they are fetched, so decoding overlaps with network
+    I/O. Worker processes sidestep the GIL; on a free-threaded interpreter the
+    pool uses threads instead. Results come back as memory-mapped Arrow IPC
+    files in a spill directory that is removed when the pool closes. Frames
+    already collected stay valid, because an unlinked file stays mapped.
+    """
+
+    def __init__(self, workers: int | None = None, *, enrich: bool = False, threads: bool | None = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.enrich = enrich
+        self.threads = free_threaded() if threads is None else threads
+        self.futures: list[Future] = []
+        self.spill_dir = tempfile.TemporaryDirectory(prefix="hn-decode-", ignore_cleanup_errors=True)
+        self.executor: Executor = (
+            ThreadPoolExecutor(max_workers=self.workers)
+            if self.threads
+            # Forking a process that already runs polars' thread pool can deadlock the child
+            else ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        )
+
+    def __enter__(self) -> "DecodePool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.spill_dir.cleanup()
+
+    def submit(self, payloads: Sequence[bytes]) -> None:
+        if payloads:
+            self.futures.append(
+                self.executor.submit(decode_items, list(payloads), self.spill_dir.name, self.enrich)
+            )
+
+    def collect(self, stats: dict) -> dict[str, pl.DataFrame | None]:
+        """Wait for all submitted batches, merging their stats and concatenating frames by type."""
+        parts: dict[str, list[pl.DataFrame]] = {}
+        # Gather in submission order so frame row order matches fetch order
+        for future in self.futures:
+            paths, batch_stats = future.result()
+            for key, count in batch_stats.items():
+                stats[key] = stats.get(key, 0) + count
+            for item_type, path in paths.items():
+                parts.setdefault(item_type, []).append(read_ipc_file(path))
+        self.futures = []
+        return {item_type: pl.concat(dfs, rechunk=False) for item_type, dfs in parts.items()}
@@ -0,0 +1,153 @@
+import cProfile
+import functools
+import io
+import pstats
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from pathlib import Path
+from time import perf_counter
+from types import FrameType
+from typing import Any
+
+PROFILE_MODES = ("cpu", "mem")
+TOP_N = 25
+
+
+def frame_label(filename: str, name: str) -> str:
+    return f"{name} ({Path(filename).name})"
+
+
+def collapse(stack_counts: Counter[tuple[str, ...]]) -> str:
+    """Render stacks in the folded format read by flamegraph.pl, speedscope and inferno."""
+    return "\n".join(f"{';'.join(stack)} {count}" for stack, count in stack_counts.most_common())
+
+
+class StackSampler:
+    """Samples one thread's Python stack at a fixed interval into folded-stack counts."""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="step-sampler", daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame: FrameType | None = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code.co_filename, frame.f_code.co_name))
+                frame = frame.f_back
+            if stack:
+                self.stacks[tuple(reversed(stack))] += 1
+
+
+class StepProfiler:
+    """Profiles a block in "cpu" (cProfile plus a stack sampler) or "mem" (tracemalloc) mode."""
+
+    def __init__(self, mode: str, top_n: int = TOP_N):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Invalid profile mode: {mode}. Must be one of {PROFILE_MODES}")
+        self.mode = mode
+        self.top_n = top_n
+        self.wall_seconds = 0.0
+        self.profiler = cProfile.Profile()
+        self.sampler = StackSampler(threading.get_ident())
+        self.snapshot: tracemalloc.Snapshot | None = None
+        self.peak_bytes = 0
+
+    def __enter__(self) -> "StepProfiler":
+        if self.mode == "cpu":
+            self.sampler.start()
+            self.profiler.enable()
+        else:
+            tracemalloc.start(25)
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.wall_seconds = perf_counter() - self.started
+        if self.mode == "cpu":
+            self.profiler.disable()
+            self.sampler.stop()
+        else:
+            self.snapshot = tracemalloc.take_snapshot()
+            _, self.peak_bytes = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    def report(self) -> dict[str, Any]:
+        report: dict[str, Any] = {"mode": self.mode, "wall_seconds": self.wall_seconds}
+        if self.mode == "cpu":
+            stream = io.StringIO()
+            pstats.Stats(self.profiler, stream=stream).sort_stats("cumulative").print_stats(self.top_n)
+            report["top"] = stream.getvalue()
+            report["collapsed"] = collapse(self.sampler.stacks)
+        elif self.snapshot is not None:
+            snapshot = self.snapshot.filter_traces(
+                [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+            )
+            report["peak_bytes"] = self.peak_bytes
+            report["top"] = [
+                {"site": str(stat.traceback[0]), "size_bytes": stat.size, "count": stat.count}
+                for stat in snapshot.statistics("lineno")[: self.top_n]
+            ]
+            # Live allocations weighted by bytes, as a memory flamegraph
+            stacks: Counter[tuple[str, ...]] = Counter()
+            for stat in snapshot.statistics("traceback"):
+                stack = tuple(f"{Path(frame.filename).name}:{frame.lineno}" for frame in stat.traceback)
+                stacks[stack] += stat.size
+            report["collapsed"] = collapse(stacks)
+        return report
+
+
+def render_card(step_name: str, report: dict[str, Any]) -> None:
+    """Add the report to the step's card when cards are enabled, e.g. with `--with card`."""
+    try:
+        from metaflow import current
+        from metaflow.cards import Markdown
+
+        card = current.card
+    except (ImportError, AttributeError):
+        return
+
+    card.append(Markdown(f"## Profile: {step_name} ({report['mode']}, {report['wall_seconds']:.2f}s)"))
+    if report["mode"] == "cpu":
+        card.append(Markdown(f"```\n{report['top']}\n```"))
+    else:
+        rows = "\n".join(f"| `{row['site']}` | {row['size_bytes'] / 1024:,.1f} | {row['count']:,} |" for row in report["top"])
+        card.append(Markdown(f"Peak traced memory: {report['peak_bytes'] / 2**20:,.1f} MiB"))
+        card.append(Markdown(f"| Site | KiB | Blocks |\n|---|---|---|\n{rows}"))
+
+
+def profiled(step_fn: Callable) -> Callable:
+    """Profile a Metaflow step when the flow's `profile` parameter is "cpu" or "mem".
+
+    Apply below @step. Reports accumulate in the `profile_reports` artifact,
+    keyed by step name. When profiling is off the step runs unwrapped.
+    """
+
+    @functools.wraps(step_fn)
+    def wrapper(self, *args, **kwargs):
+        mode = getattr(self, "profile", None)
+        if not mode:
+            return step_fn(self, *args, **kwargs)
+
+        with StepProfiler(mode) as profiler:
+            result = step_fn(self, *args, **kwargs)
+        report = profiler.report()
+        self.profile_reports = {**getattr(self, "profile_reports", {}), step_fn.__name__: report}
+        render_card(step_fn.__name__, report)
+        return result
+
+    return wrapper
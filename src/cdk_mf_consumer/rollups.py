@@ -0,0 +1,274 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import json
+import shutil
+
+import polars as pl
+
+from cdk_mf_consumer.features import url_domain
+
+
+@dataclass(frozen=True)
+class Rollup:
+    name: str
+    keys: list[str]
+    measures: dict[str, pl.Expr]
+    where: pl.Expr
+    partition: pl.Expr
+
+
+# Item ids are grouped into buckets so an update only reads the state and
+# per-parent partitions its batch touches.
+ID_BUCKET_SIZE = 100_000
+
+CONTRIBUTION_SCHEMA = {
+    "id": pl.Int64,
+    "kind": pl.Utf8,
+    "day": pl.Date,
+    "by": pl.Utf8,
+    "domain": pl.Utf8,
+    "parent": pl.Int64,
+    "score": pl.Int64,
+}
+
+
+def id_bucket(column: str) -> pl.Expr:
+    return (pl.col(column) // ID_BUCKET_SIZE).cast(pl.Utf8).str.zfill(5).alias("partition")
+
+
+def day_partition() -> pl.Expr:
+    return pl.col("day").dt.strftime("%Y-%m-%d").alias("partition")
+
+
+# Measures are evaluated over signed contribution rows: +1 for the current
+# version of an item, -1 for the previously stored version being retracted.
+ROLLUPS = [
+    # Direct replies per parent item (story, comment or poll). Counting whole
+    # threads per story would need each comment's root, which the API omits.
+    Rollup(
+        name="reply_counts",
+        keys=["parent"],
+        measures={"replies": pl.col("sign")},
+        where=pl.col("kind") == "comment",
+        partition=id_bucket("parent"),
+    ),
+    Rollup(
+        name="domain_daily",
+        keys=["day", "domain"],
+        measures={
+            "stories": pl.col("sign"),
+            "score": pl.col("sign") * pl.col("score"),
+        },
+        where=(pl.col("kind") == "story") & pl.col("domain").is_not_null(),
+        partition=day_partition(),
+    ),
+    Rollup(
+        name="user_daily",
+        keys=["day", "by"],
+        measures={
+            "submissions": pl.col("sign"),
+            "comments": pl.col("sign") * (pl.col("kind") == "comment").cast(pl.Int64),
+            "score": pl.col("sign") * pl.col("score"),
+        },
+        where=pl.col("by").is_not_null(),
+        partition=day_partition(),
+    ),
+]
+
+
+class RollupStore:
+    """Daily aggregates maintained incrementally from each batch of fetched items.
+
+    Every item's contribution to the rollups is kept in a state table. When an
+    item is fetched again, its stored contribution is retracted before the new
+    one is added, so totals stay correct for edited, re-scored and deleted
+    items. Work is proportional to the batch: only the state buckets and
+    rollup partitions touched by the batch are read and rewritten.
+
+    A batch's state and aggregate partitions are published together: they are
+    staged first, then a manifest is written, then everything is renamed into
+    place. A crash before the manifest leaves the store untouched; a crash
+    after it is rolled forward the next time the store is opened.
+    """
+
+    MANIFEST = "_commit.json"
+    STAGING = "_staging"
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self.recover()
+
+    def table_path(self, name: str, partition: str) -> Path:
+        return self.root / name / f"{partition}.parquet"
+
+    def read_table(self, name: str) -> pl.DataFrame | None:
+        files = sorted((self.root / name).glob("*.parquet"))
+        if not files:
+            return None
+        return pl.read_parquet(files)
+
+    def known_ids(self, item_ids: list[int]) -> set[int]:
+        """Return the ids among item_ids that already have stored state, reading only their buckets."""
+        ids = pl.Series("id", item_ids, dtype=pl.Int64)
+        known = set()
+        for bucket in ids.to_frame().select(id_bucket("id"))["partition"].unique():
+            path = self.table_path("state", bucket)
+            if path.exists():
+                stored = pl.read_parquet(path, columns=["id"])
+                known.update(stored.filter(pl.col("id").is_in(ids.implode()))["id"].to_list())
+        return known
+
+    def contributions(self, frames: dict[str, pl.DataFrame | None]) -> pl.DataFrame:
+        parts = []
+        for item_type, df in frames.items():
+            if df is None or df.is_empty():
+                continue
+            columns = set(df.columns)
+            parts.append(
+                df.filter(~pl.col("deleted")).select(
+                    pl.col("id"),
+                    pl.lit(item_type).alias("kind"),
+                    pl.col("time").dt.date().alias("day"),
+                    pl.col("by"),
+                    url_domain().alias("domain") if "url" in columns else pl.lit(None).alias("domain"),
+                    pl.col("parent") if "parent" in columns else pl.lit(None).alias("parent"),
+                    pl.col("score").fill_null(0) if "score" in columns else pl.lit(0).alias("score"),
+                ).cast(CONTRIBUTION_SCHEMA)
+            )
+        if not parts:
+            return pl.DataFrame(schema=CONTRIBUTION_SCHEMA)
+        return pl.concat(parts).unique(subset="id", keep="last", maintain_order=True)
+
+    def update(
+        self, frames: dict[str, pl.DataFrame | None], users: pl.DataFrame | None = None
+    ) -> dict[str, list[Path]]:
+        outputs: dict[str, dict[Path, pl.DataFrame]] = {}
+        fetched_ids = pl.concat(
+            [df.select("id") for df in frames.values() if df is not None and not df.is_empty()]
+            or [pl.DataFrame(schema={"id": pl.Int64})]
+        )["id"].unique()
+
+        if len(fetched_ids):
+            current = self.contributions(frames)
+            previous, outputs["state"] = self.swap_state(fetched_ids, current)
+            delta = pl.concat(
+                [
+                    previous.with_columns(pl.lit(-1, pl.Int64).alias("sign")),
+                    current.with_columns(pl.lit(1, pl.Int64).alias("sign")),
+                ]
+            )
+            for rollup in ROLLUPS:
+                outputs[rollup.name] = self.apply(rollup, delta)
+
+        if users is not None and not users.is_empty():
+            outputs["user_karma_daily"] = self.apply_karma(users)
+
+        self.commit({path: df for tables in outputs.values() for path, df in tables.items()})
+        return {name: list(tables) for name, tables in outputs.items()}
+
+    def swap_state(
+        self, fetched_ids: pl.Series, current: pl.DataFrame
+    ) -> tuple[pl.DataFrame, dict[Path, pl.DataFrame]]:
+        """Replace the stored contributions of fetched items, returning the old ones and the new buckets."""
+        previous = []
+        buckets_out = {}
+        current = current.with_columns(id_bucket("id"))
+        buckets = fetched_ids.to_frame().select(id_bucket("id"))["partition"].unique().sort()
+
+        for bucket in buckets:
+            path = self.table_path("state", bucket)
+            stored = pl.read_parquet(path) if path.exists() else pl.DataFrame(schema=CONTRIBUTION_SCHEMA)
+            refetched = pl.col("id").is_in(fetched_ids.implode())
+            previous.append(stored.filter(refetched))
+            buckets_out[path] = pl.concat(
+                [
+                    stored.filter(~refetched),
+                    current.filter(pl.col("partition") == bucket).drop("partition"),
+                ]
+            )
+
+        return pl.concat(previous), buckets_out
+
+    def apply(self, rollup: Rollup, delta: pl.DataFrame) -> dict[Path, pl.DataFrame]:
+        changes = (
+            delta.filter(rollup.where)
+            .with_columns(rollup.partition)
+            .group_by(["partition", *rollup.keys])
+            .agg(expr.sum().alias(name) for name, expr in rollup.measures.items())
+            # Re-fetched items whose contribution did not change cancel out here
+            .filter(pl.any_horizontal(pl.col(name) != 0 for name in rollup.measures))
+        )
+        return self.merge_partitions(rollup.name, rollup.keys, list(rollup.measures), changes)
+
+    def merge_partitions(
+        self, name: str, keys: list[str], measures: list[str], changes: pl.DataFrame
+    ) -> dict[Path, pl.DataFrame]:
+        merged = {}
+        # The first measure is the row count; a key whose count drops to zero has no contributors left
+        count = measures[0]
+        for (partition,), change in changes.partition_by("partition", as_dict=True, include_key=False).items():
+            path = self.table_path(name, str(partition))
+            existing = [pl.read_parquet(path)] if path.exists() else []
+            merged[path] = (
+                pl.concat([*existing, change], how="vertical_relaxed")
+                .group_by(keys)
+                .agg(pl.col(measure).sum() for measure in measures)
+                .filter(pl.col(count) != 0)
+                .sort(keys)
+            )
+        return merged
+
+    def apply_karma(self, users: pl.DataFrame) -> dict[Path, pl.DataFrame]:
+        # Karma is a point-in-time value rather than a sum, so the latest observation per user per day wins
+        observations = users.select(
+            pl.col("timestamp").dt.date().alias("day"),
+            pl.col("id").alias("user"),
+            pl.col("karma"),
+            pl.col("timestamp"),
+        ).with_columns(day_partition())
+        merged = {}
+        for (partition,), batch in observations.partition_by("partition", as_dict=True, include_key=False).items():
+            path = self.table_path("user_karma_daily", str(partition))
+            existing = [pl.read_parquet(path)] if path.exists() else []
+            merged[path] = (
+                pl.concat([*existing, batch], how="vertical_relaxed")
+                .sort("timestamp")
+                .unique(subset=["day", "user"], keep="last")
+                .sort("user")
+            )
+        return merged
+
+    def commit(self, outputs: dict[Path, pl.DataFrame]) -> None:
+        staging = self.root / self.STAGING
+        shutil.rmtree(staging, ignore_errors=True)
+        relative_paths = []
+        for path, df in outputs.items():
+            relative = path.relative_to(self.root)
+            staged = staging / relative
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            df.write_parquet(staged, compression="zstd")
+            relative_paths.append(str(relative))
+
+        # Once the manifest exists the batch is committed and recover() will finish publishing it
+        manifest = self.root / self.MANIFEST
+        tmp_manifest = manifest.with_suffix(".tmp")
+        tmp_manifest.write_text(json.dumps(relative_paths))
+        tmp_manifest.replace(manifest)
+        self.recover()
+
+    def recover(self) -> None:
+        manifest = self.root / self.MANIFEST
+        staging = self.root / self.STAGING
+        if manifest.exists():
+            for relative in json.loads(manifest.read_text()):
+                staged = staging / relative
+                # Already published by an earlier, interrupted attempt
+                if not staged.exists():
+                    continue
+                target = self.root / relative
+                target.parent.mkdir(parents=True, exist_ok=True)
+                staged.replace(target)
+            manifest.unlink()
+        # Anything left in staging without a manifest belongs to a batch that never committed
+        shutil.rmtree(staging, ignore_errors=True)
@@ -0,0 +1,91 @@
+import json
+from collections.abc import Callable, Collection, Iterable, Iterator
+from pathlib import Path
+from time import perf_counter
+
+
+class FetchScheduler:
+    """Hands out fetch batches in priority order until a time or request budget runs out.
+
+    Throughput is tracked live as a moving average of seconds per request,
+    measured between batches (so it includes rate-limit sleeps). Before each
+    batch the scheduler checks that the batch is predicted to finish inside
+    the remaining time; ids that do not fit are left in `deferred` for the
+    next run instead of being dropped.
+    """
+
+    def __init__(
+        self,
+        *,
+        time_budget: float | None = None,
+        request_budget: int | None = None,
+        smoothing: float = 0.3,
+        clock: Callable[[], float] = perf_counter,
+    ):
+        self.time_budget = time_budget or None
+        self.request_budget = request_budget or None
+        self.smoothing = smoothing
+        self.clock = clock
+        self.started = clock()
+        self.requests = 0
+        self.seconds_per_request: float | None = None
+        self.deferred: list[int] = []
+
+    @staticmethod
+    def prioritize(item_ids: Iterable[int], stored_ids: Collection[int] = ()) -> list[int]:
+        """Order ids: items not yet stored first, then refreshes of stored ones; newest first within each."""
+        unique_ids = set(item_ids)
+        return sorted(unique_ids, key=lambda item_id: (item_id in stored_ids, -item_id))
+
+    @property
+    def elapsed(self) -> float:
+        return self.clock() - self.started
+
+    def fits(self, batch_size: int) -> bool:
+        if self.request_budget is not None and self.requests + batch_size > self.request_budget:
+            return False
+        if self.time_budget is not None and self.seconds_per_request is not None:
+            return self.elapsed + batch_size * self.seconds_per_request <= self.time_budget
+        # Before the first measurement only an exhausted clock stops the run
+        return self.time_budget is None or self.elapsed < self.time_budget
+
+    def observe(self, requests: int, seconds: float) -> None:
+        rate = seconds / requests
+        if self.seconds_per_request is None:
+            self.seconds_per_request = rate
+        else:
+            self.seconds_per_request = self.smoothing * rate + (1 - self.smoothing) * self.seconds_per_request
+
+    def batches(self, item_ids: list[int], batch_size: int) -> Iterator[list[int]]:
+        for i in range(0, len(item_ids), batch_size):
+            batch = item_ids[i:i + batch_size]
+            if not self.fits(len(batch)):
+                self.deferred = item_ids[i:]
+                return
+            batch_started = self.clock()
+            yield batch
+            self.requests += len(batch)
+            self.observe(len(batch), self.clock() - batch_started)
+        self.deferred = []
+
+    @property
+    def requests_per_second(self) -> float:
+        return 1 / self.seconds_per_request if self.seconds_per_request else 0.0
+
+
+class FetchQueue:
+    """Item ids deferred by one run and picked up first by the next."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def load(self) -> list[int]:
+        if not self.path.exists():
+            return []
+        return json.loads(self.path.read_text())
+
+    def save(self, item_ids: list[int]) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(item_ids))
+        tmp_path.replace(self.path)
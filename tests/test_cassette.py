@@ -0,0 +1,94 @@
+from collections.abc import Iterator
+from pathlib import Path
+
+import httpx
+import pytest
+
+from cdk_mf_consumer.cassette import Cassette, CassetteMissError, CassetteTransport, parse_latency
+from cdk_mf_consumer.client import HNClient
+from cdk_mf_consumer.models.base_models import HNCommentItem
+
+RESPONSES = {
+    "/v0/item/2.json": b'{"by":"sama","id":2,"parent":1,"text":"First","time":1160418628,"type":"comment"}',
+    "/v0/maxitem.json": b"42",
+    "/v0/item/9.json": b"null",
+}
+
+
+def live() -> httpx.MockTransport:
+    return httpx.MockTransport(lambda request: httpx.Response(200, content=RESPONSES[request.url.path]))
+
+
+@pytest.fixture
+def client() -> Iterator[HNClient]:
+    hn_client = HNClient()
+    original = hn_client.client
+    yield hn_client
+    hn_client.client.close()
+    hn_client.client = original
+
+
+def record(path: Path, client: HNClient) -> None:
+    transport = CassetteTransport(path, "record", transport=live())
+    client.use_transport(transport)
+    assert client.get_max_item_id().id == 42
+    assert client.get_item(2) is not None
+    transport.close()
+
+
+def test_should_replay_recorded_responses_offline(tmp_path: Path, client: HNClient) -> None:
+    path = tmp_path / "run.cassette"
+    record(path, client)
+
+    client.use_transport(CassetteTransport(path))
+    item = client.get_item(2)
+    assert isinstance(item, HNCommentItem)
+    assert item.text == "First"
+    assert client.get_max_item_id().id == 42
+
+
+def test_should_merge_new_recordings_into_existing_cassette(tmp_path: Path, client: HNClient) -> None:
+    path = tmp_path / "run.cassette"
+    record(path, client)
+
+    transport = CassetteTransport(path, "record", transport=live())
+    client.use_transport(transport)
+    assert client.get_item(9) is None
+    transport.close()
+
+    cassette = Cassette(path)
+    assert len(cassette) == 3
+    assert cassette.get("GET /v0/item/9.json") == (200, b"null")
+
+
+def test_should_raise_on_unrecorded_request(tmp_path: Path) -> None:
+    path = tmp_path / "empty.cassette"
+    CassetteTransport(path, "record", transport=live()).close()
+
+    with httpx.Client(transport=CassetteTransport(path)) as http, pytest.raises(CassetteMissError):
+        http.get("https://hacker-news.firebaseio.com/v0/item/2.json")
+
+
+def test_should_apply_synthetic_latency(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "run.cassette"
+    cassette = Cassette(path)
+    cassette.put("GET /v0/maxitem.json", 200, b"42")
+    cassette.save()
+
+    delays = []
+    monkeypatch.setattr("cdk_mf_consumer.cassette.sleep", delays.append)
+    with httpx.Client(transport=CassetteTransport(path, latency=parse_latency("constant:25"))) as http:
+        assert http.get("https://example.test/v0/maxitem.json").content == b"42"
+    assert delays == [0.025]
+
+
+@pytest.mark.parametrize("spec", ["constant", "lognormal:", "uniform:10"])
+def test_should_reject_invalid_latency_spec(spec: str) -> None:
+    with pytest.raises(ValueError, match="Invalid latency spec"):
+        parse_latency(spec)
+
+
+def test_should_draw_lognormal_latencies_around_median() -> None:
+    latency = parse_latency("lognormal:100,0.3")
+    samples = sorted(latency() for _ in range(2001))
+    assert 0.09 < samples[1000] < 0.11
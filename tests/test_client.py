@@ -0,0 +1,71 @@
+from collections.abc import Iterator
+
+import httpx
+import pytest
+
+from cdk_mf_consumer.client import HNClient
+from cdk_mf_consumer.models.base_models import HNCommentItem, HNStoryItem
+
+RESPONSES = {
+    "/v0/item/1.json": b'{"by":"pg","id":1,"kids":[2],"score":57,"time":1160418111,"title":"Y Combinator","type":"story","url":"http://ycombinator.com"}',
+    "/v0/item/2.json": b'{"by":"sama","id":2,"parent":1,"text":"First","time":1160418628,"type":"comment"}',
+    "/v0/item/3.json": b'{"id":3,"time":1160418628,"type":"bogus"}',
+    "/v0/item/4.json": b"null",
+    "/v0/user/pg.json": b'{"id":"pg","created":1160418092,"karma":155111,"submitted":[1]}',
+    "/v0/maxitem.json": b"42",
+    "/v0/topstories.json": b"[1,3,2]",
+    "/v0/jobstories.json": b"[]",
+}
+
+
+@pytest.fixture
+def client() -> Iterator[HNClient]:
+    hn_client = HNClient()
+    original = hn_client.client
+    hn_client.client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, content=RESPONSES[request.url.path]))
+    )
+    yield hn_client
+    hn_client.client.close()
+    hn_client.client = original
+
+
+def test_should_validate_items_by_type(client: HNClient) -> None:
+    story = client.get_item(1)
+    comment = client.get_item(2)
+    assert isinstance(story, HNStoryItem)
+    assert story.kids == [2]
+    assert isinstance(comment, HNCommentItem)
+    assert comment.parent == 1
+
+
+def test_should_return_none_for_unknown_or_missing_items(client: HNClient) -> None:
+    assert client.get_item(3) is None
+    assert client.get_item(4) is None
+    assert client.get_item_raw(4) is None
+
+
+def test_should_pass_through_raw_bytes(client: HNClient) -> None:
+    assert client.get_item_raw(2) == RESPONSES["/v0/item/2.json"]
+    assert client._get("item/2.json")["by"] == "sama"
+
+
+def test_should_decode_users_and_scalars(client: HNClient) -> None:
+    user = client.get_user("pg")
+    assert user is not None
+    assert user.karma == 155111
+    max_item = client.get_max_item_id()
+    assert max_item is not None
+    assert max_item.id == 42
+
+
+def test_should_fetch_story_lists(client: HNClient) -> None:
+    top = client.get_top_stories()
+    assert top is not None
+    assert top.items == [1, 3, 2]
+    assert client.get_story_list("job").items == []
+
+
+def test_should_reject_unknown_story_list(client: HNClient) -> None:
+    with pytest.raises(ValueError, match="Invalid story list"):
+        client.get_story_list("worst")
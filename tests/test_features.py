@@ -0,0 +1,64 @@
+from datetime import UTC, datetime
+
+import polars as pl
+import pytest
+
+from cdk_mf_consumer.data import HNData
+from cdk_mf_consumer.features import clean_text, enrich_frame, url_domain
+from cdk_mf_consumer.models.base_models import HNCommentItem, HNStoryItem
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("https://www.Example.com/path?q=1", "example.com"),
+        ("http://user@news.ycombinator.com:443/item", "news.ycombinator.com"),
+        ("ftp://files.example.org", "files.example.org"),
+        ("not a url", None),
+        (None, None),
+    ],
+)
+def test_should_extract_lowercase_domain_without_www(url: str | None, expected: str | None) -> None:
+    df = pl.DataFrame({"url": [url]}, schema={"url": pl.Utf8})
+    assert df.select(url_domain())[0, 0] == expected
+
+
+def test_should_unescape_entities_and_strip_tags() -> None:
+    text = 'It&#x27;s <i>fast</i> &amp;lt;<p>See <a href="https:&#x2F;&#x2F;x.io" rel="nofollow">x.io</a>'
+    df = pl.DataFrame({"text": [text]})
+    assert df.select(clean_text())[0, 0] == "It's fast &lt;\n\nSee x.io"
+
+
+def test_should_add_comment_features() -> None:
+    df = HNData().items_to_frames(
+        [
+            HNCommentItem(
+                id=2,
+                by="pg",
+                time=datetime(2024, 1, 15, tzinfo=UTC),
+                kids=[3, 4],
+                text="Two words",
+                parent=1,
+            )
+        ],
+        enrich=True,
+    )["comment"]
+    row = df.row(0, named=True)
+    assert row["kid_count"] == 2
+    assert row["text_clean"] == "Two words"
+    assert row["text_length"] == 9
+    assert row["word_count"] == 2
+    assert "domain" not in df.columns
+
+
+def test_should_flag_ask_and_show_stories() -> None:
+    stories = [
+        HNStoryItem(id=1, time=datetime(2024, 1, 15, tzinfo=UTC), title="Ask HN: Why?"),
+        HNStoryItem(id=2, time=datetime(2024, 1, 15, tzinfo=UTC), title="show hn: a thing", url="https://a.dev"),
+        HNStoryItem(id=3, time=datetime(2024, 1, 15, tzinfo=UTC), title="Asking HN things"),
+    ]
+    df = enrich_frame("story", HNData().items_to_frames(stories)["story"])
+    assert df["is_ask"].to_list() == [True, False, False]
+    assert df["is_show"].to_list() == [False, True, False]
+    assert df["domain"].to_list() == [None, "a.dev", None]
+    assert df["title_length"].to_list() == [12, 16, 16]
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import httpx
+import polars as pl
+import pytest
+
+from cdk_mf_consumer.data import process_batch, process_raw_batch
+from cdk_mf_consumer.pipeline import DecodePool, decode_items, read_ipc_file
+
+PAYLOADS = [
+    b'{"by":"pg","id":1,"score":57,"time":1160418111,"title":"Y Combinator","type":"story","url":"http://ycombinator.com"}',
+    b'{"by":"sama","id":2,"parent":1,"text":"First","time":1160418628,"type":"comment"}',
+    b'{"id":3,"time":1160418628,"type":"comment"}',
+    b'{"by":"dang","id":4,"parent":2,"text":"Second","time":1160418700,"type":"comment"}',
+    b'{"id":5,"time":1160418628,"type":"bogus"}',
+]
+
+
+class FakeClient:
+    def __init__(self, responses: dict[int, bytes | None]):
+        self.responses = responses
+
+    def get_item_raw(self, item_id: int) -> bytes | None:
+        if item_id not in self.responses:
+            raise httpx.ConnectError("unreachable")
+        return self.responses[item_id]
+
+
+def test_should_decode_payloads_into_ipc_files(tmp_path: Path) -> None:
+    paths, stats = decode_items(PAYLOADS, str(tmp_path), enrich=True)
+    comments = read_ipc_file(paths["comment"])
+    assert stats == {"success": 3, "success_story": 1, "success_comment": 2, "failed": 1, "not_found": 1}
+    assert comments["id"].to_list() == [2, 4]
+    assert "word_count" in comments.columns
+
+
+@pytest.mark.parametrize("threads", [False, True])
+def test_should_merge_batches_in_submission_order(threads: bool) -> None:
+    # Run polars in this process first: forked workers would inherit its thread pool and deadlock
+    assert pl.DataFrame({"a": [1, 2]}).select(pl.col("a").sum()).item() == 3
+
+    stats = {"success": 0, "failed": 0, "not_found": 0}
+    with DecodePool(2, threads=threads) as pool:
+        pool.submit(PAYLOADS[:2])
+        pool.submit([])
+        pool.submit(PAYLOADS[2:])
+        frames = pool.collect(stats)
+        assert frames["comment"]["id"].to_list() == [2, 4]
+
+    # Collected frames outlive the pool's spill directory
+    assert frames["story"]["id"].to_list() == [1]
+    assert stats["success"] == 3
+    assert stats["failed"] == 1
+    assert stats["not_found"] == 1
+
+
+def test_should_count_items_the_same_way_in_step_and_in_pool() -> None:
+    client = FakeClient({i + 1: raw for i, raw in enumerate(PAYLOADS)} | {6: None})
+    item_ids = [1, 2, 3, 4, 5, 6, 7]
+
+    in_step = {"success": 0, "failed": 0, "not_found": 0}
+    process_batch(client, item_ids, in_step)
+
+    in_pool = {"success": 0, "failed": 0, "not_found": 0}
+    with DecodePool(1, threads=True) as pool:
+        pool.submit(process_raw_batch(client, item_ids, in_pool))
+        pool.collect(in_pool)
+
+    assert in_step == in_pool == {
+        "success": 3,
+        "success_story": 1,
+        "success_comment": 2,
+        "failed": 2,
+        "not_found": 2,
+    }
@@ -0,0 +1,60 @@
+import pytest
+
+from cdk_mf_consumer.profiling import StepProfiler, profiled
+
+
+class FakeFlow:
+    def __init__(self, profile: str):
+        self.profile = profile
+        self.calls = 0
+
+    @profiled
+    def busy_step(self):
+        self.calls += 1
+        total = 0
+        for i in range(300_000):
+            total += i * i
+        self.total = total
+
+    @profiled
+    def allocating_step(self):
+        self.blob = [bytes(1024) for _ in range(2000)]
+
+    @profiled
+    def small_step(self):
+        self.small = list(range(100))
+
+
+def test_should_run_step_unwrapped_when_disabled() -> None:
+    flow = FakeFlow("")
+    flow.busy_step()
+    assert flow.calls == 1
+    assert not hasattr(flow, "profile_reports")
+
+
+def test_should_record_cpu_profile_and_folded_stacks() -> None:
+    flow = FakeFlow("cpu")
+    flow.busy_step()
+    report = flow.profile_reports["busy_step"]
+    assert report["mode"] == "cpu"
+    assert "busy_step" in report["top"]
+    stack, count = report["collapsed"].splitlines()[0].rsplit(" ", 1)
+    assert "busy_step (test_profiling.py)" in stack
+    assert int(count) > 0
+
+
+def test_should_record_top_allocation_sites() -> None:
+    flow = FakeFlow("mem")
+    flow.allocating_step()
+    flow.small_step()
+    reports = flow.profile_reports
+    assert set(reports) == {"allocating_step", "small_step"}
+    top = reports["allocating_step"]["top"][0]
+    assert "test_profiling.py" in top["site"]
+    assert top["size_bytes"] >= 2000 * 1024
+    assert reports["allocating_step"]["peak_bytes"] >= top["size_bytes"]
+
+
+def test_should_reject_unknown_mode() -> None:
+    with pytest.raises(ValueError, match="Invalid profile mode"):
+        StepProfiler("gpu")
@@ -0,0 +1,50 @@
+import threading
+from collections import Counter
+from datetime import UTC, datetime
+
+import polars as pl
+
+from cdk_mf_consumer.data import HNData, hydrate_items
+from cdk_mf_consumer.models.response_models import ItemListResponse
+
+SNAPSHOT_TIME = datetime(2024, 1, 15, 12)
+
+
+class CountingClient:
+    def __init__(self):
+        self.calls: Counter[int] = Counter()
+        self.lock = threading.Lock()
+
+    def get_item_raw(self, item_id: int) -> bytes | None:
+        with self.lock:
+            self.calls[item_id] += 1
+        if item_id == 404:
+            return None
+        return f'{{"id":{item_id},"time":1700000000,"type":"story","title":"Story {item_id}"}}'.encode()
+
+
+def test_should_fetch_each_listed_item_once() -> None:
+    client = CountingClient()
+    stats = {"success": 0, "failed": 0, "not_found": 0}
+    top, new, best = [3, 1, 2], [5, 3, 404], [1, 3]
+
+    items = hydrate_items(client, top + new + best, stats, max_workers=3)
+
+    assert sorted(item.id for item in items) == [1, 2, 3, 5]
+    assert set(client.calls.values()) == {1}
+    assert stats == {"success": 4, "success_story": 4, "failed": 0, "not_found": 1}
+
+
+def test_should_build_rank_history_frame() -> None:
+    lists = {"top": ItemListResponse(items=[3, 1]), "job": ItemListResponse(items=[9])}
+    df = HNData().rankings_to_frame(lists, SNAPSHOT_TIME)
+
+    assert df.schema["list"] == pl.Enum(["top", "new", "best", "ask", "show", "job"])
+    assert df.schema["rank"] == pl.UInt16
+    assert df.select("list", "rank", "id").rows() == [("top", 1, 3), ("top", 2, 1), ("job", 1, 9)]
+    assert df["snapshot_time"].unique().to_list() == [SNAPSHOT_TIME]
+
+
+def test_should_handle_empty_lists() -> None:
+    df = HNData().rankings_to_frame({"ask": ItemListResponse(items=[])}, datetime.now(tz=UTC))
+    assert df.is_empty()
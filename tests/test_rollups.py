@@ -0,0 +1,130 @@
+from datetime import UTC, datetime
+from pathlib import Path
+
+import polars as pl
+import pytest
+
+from cdk_mf_consumer.data import HNData
+from cdk_mf_consumer.models.base_models import HNCommentItem, HNItem, HNStoryItem
+from cdk_mf_consumer.rollups import RollupStore
+
+DAY = datetime(2024, 1, 15, 12, tzinfo=UTC)
+
+
+def story(item_id: int, score: int, url: str = "https://example.com/a", **kwargs) -> HNStoryItem:
+    return HNStoryItem(id=item_id, by="pg", time=DAY, title="A story", url=url, score=score, **kwargs)
+
+
+def comment(item_id: int, parent: int, by: str = "dang", **kwargs) -> HNCommentItem:
+    return HNCommentItem(id=item_id, by=by, time=DAY, text="Nice", parent=parent, **kwargs)
+
+
+def update(store: RollupStore, items: list[HNItem]) -> dict[str, list[Path]]:
+    return store.update(HNData().items_to_frames(items))
+
+
+def test_should_aggregate_first_batch(tmp_path: Path) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), story(2, 5, url="https://other.org"), comment(3, 1), comment(4, 1)])
+
+    assert store.read_table("reply_counts").to_dicts() == [{"parent": 1, "replies": 2}]
+    assert store.read_table("domain_daily").sort("domain").select("domain", "stories", "score").to_dicts() == [
+        {"domain": "example.com", "stories": 1, "score": 10},
+        {"domain": "other.org", "stories": 1, "score": 5},
+    ]
+    users = store.read_table("user_daily").sort("by").select("by", "submissions", "comments", "score")
+    assert users.to_dicts() == [
+        {"by": "dang", "submissions": 2, "comments": 2, "score": 0},
+        {"by": "pg", "submissions": 2, "comments": 0, "score": 15},
+    ]
+
+
+def test_should_retract_previous_version_of_refetched_items(tmp_path: Path) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), comment(3, 1), comment(4, 1)])
+    update(store, [story(1, 42), comment(4, 1, deleted=True)])
+
+    assert store.read_table("reply_counts").to_dicts() == [{"parent": 1, "replies": 1}]
+    assert store.read_table("domain_daily").select("stories", "score").to_dicts() == [{"stories": 1, "score": 42}]
+    users = store.read_table("user_daily").sort("by").select("by", "submissions", "score")
+    assert users.to_dicts() == [
+        {"by": "dang", "submissions": 1, "score": 0},
+        {"by": "pg", "submissions": 1, "score": 42},
+    ]
+
+
+def test_should_only_touch_partitions_in_batch(tmp_path: Path) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), comment(3, 1)])
+    written = update(store, [comment(250_001, 1)])
+
+    assert [path.name for path in written["state"]] == ["00002.parquet"]
+    assert [path.name for path in written["domain_daily"]] == []
+    assert store.read_table("reply_counts")["replies"].to_list() == [2]
+
+
+def test_should_keep_latest_karma_per_user_per_day(tmp_path: Path) -> None:
+    store = RollupStore(tmp_path)
+    schema = HNData().user_schema
+    for karma, hour in [(100, 1), (120, 9)]:
+        users = pl.DataFrame(
+            [{"id": "pg", "created": DAY, "karma": karma, "about": None, "submitted": [], "timestamp": DAY.replace(hour=hour)}],
+            schema=schema,
+        )
+        store.update({}, users)
+
+    assert store.read_table("user_karma_daily").select("user", "karma").to_dicts() == [{"user": "pg", "karma": 120}]
+
+
+def test_should_leave_store_untouched_when_batch_fails_before_commit(tmp_path: Path, monkeypatch) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), comment(3, 1)])
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pl.DataFrame, "write_parquet", fail)
+        with pytest.raises(OSError):
+            update(store, [story(1, 42), comment(4, 1)])
+
+    # Rerunning the failed batch must apply it exactly once
+    update(RollupStore(tmp_path), [story(1, 42), comment(4, 1)])
+    assert store.read_table("reply_counts").to_dicts() == [{"parent": 1, "replies": 2}]
+    assert store.read_table("domain_daily").select("stories", "score").to_dicts() == [{"stories": 1, "score": 42}]
+
+
+def test_should_roll_forward_batch_interrupted_while_publishing(tmp_path: Path, monkeypatch) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), comment(3, 1)])
+
+    original_replace = Path.replace
+    published = []
+
+    def crash_after_state(self: Path, target):
+        # Publish the manifest and the state bucket, then die before any aggregate partition is swapped in
+        if len(published) == 2:
+            raise OSError("killed")
+        published.append(target)
+        return original_replace(self, target)
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Path, "replace", crash_after_state)
+        with pytest.raises(OSError):
+            update(store, [story(1, 42), comment(4, 1)])
+
+    recovered = RollupStore(tmp_path)
+    assert recovered.read_table("reply_counts").to_dicts() == [{"parent": 1, "replies": 2}]
+    assert recovered.read_table("domain_daily").select("stories", "score").to_dicts() == [{"stories": 1, "score": 42}]
+
+    # A later refetch retracts exactly what was published
+    update(recovered, [comment(4, 1, deleted=True)])
+    assert recovered.read_table("reply_counts").to_dicts() == [{"parent": 1, "replies": 1}]
+
+
+def test_should_report_known_ids_from_state(tmp_path: Path) -> None:
+    store = RollupStore(tmp_path)
+    update(store, [story(1, 10), comment(250_001, 1)])
+
+    assert store.known_ids([1, 2, 250_001, 999_999]) == {1, 250_001}
+    assert RollupStore(tmp_path / "empty").known_ids([1]) == set()
@@ -0,0 +1,82 @@
+from pathlib import Path
+
+from cdk_mf_consumer.scheduler import FetchQueue, FetchScheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def run(scheduler: FetchScheduler, clock: FakeClock, item_ids: list[int], seconds_per_request: float) -> list[list[int]]:
+    batches = []
+    for batch in scheduler.batches(item_ids, batch_size=10):
+        batches.append(batch)
+        clock.now += len(batch) * seconds_per_request
+    return batches
+
+
+def test_should_order_new_items_before_refreshes_newest_first() -> None:
+    ordered = FetchScheduler.prioritize([5, 9, 1, 7, 9, 3], stored_ids={9, 3})
+
+    assert ordered == [7, 5, 1, 9, 3]
+
+
+def test_should_schedule_everything_without_budget() -> None:
+    clock = FakeClock()
+    scheduler = FetchScheduler(clock=clock)
+
+    batches = run(scheduler, clock, list(range(25)), seconds_per_request=1.0)
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert scheduler.deferred == []
+
+
+def test_should_stop_at_request_budget() -> None:
+    clock = FakeClock()
+    scheduler = FetchScheduler(request_budget=20, clock=clock)
+
+    batches = run(scheduler, clock, list(range(35)), seconds_per_request=0.1)
+
+    assert sum(len(batch) for batch in batches) == 20
+    assert scheduler.deferred == list(range(20, 35))
+
+
+def test_should_defer_batches_predicted_to_overrun_time_budget() -> None:
+    clock = FakeClock()
+    scheduler = FetchScheduler(time_budget=25.0, clock=clock)
+
+    # 10 requests take 10s: after two batches (20s) a third would end at 30s
+    batches = run(scheduler, clock, list(range(50)), seconds_per_request=1.0)
+
+    assert len(batches) == 2
+    assert scheduler.deferred == list(range(20, 50))
+    assert scheduler.requests_per_second == 1.0
+
+
+def test_should_adapt_to_changing_throughput() -> None:
+    clock = FakeClock()
+    scheduler = FetchScheduler(time_budget=100.0, smoothing=0.5, clock=clock)
+
+    batches = []
+    for batch in scheduler.batches(list(range(200)), batch_size=10):
+        batches.append(batch)
+        # The API slows down from the third batch on
+        clock.now += len(batch) * (0.5 if len(batches) <= 2 else 4.0)
+
+    assert clock.now <= 100.0
+    assert scheduler.seconds_per_request > 2.0
+    assert len(scheduler.deferred) == 200 - 10 * len(batches)
+
+
+def test_should_round_trip_queue(tmp_path: Path) -> None:
+    queue = FetchQueue(tmp_path / "queue" / "items.json")
+
+    assert queue.load() == []
+    queue.save([3, 2, 1])
+    assert queue.load() == [3, 2, 1]
+    queue.save([])
+    assert queue.load() == []